@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
 from pathlib import Path
+import os
 import pymysql
 pymysql.install_as_MySQLdb()
 from datetime import timedelta
@@ -29,7 +30,8 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = 'django-insecure-ov1(-wqc0-vjxyzc*1b@jitb0_r20v32#jr%v8fmi6h#ja!ooj'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# 生产环境使用 campus_delivery.settings_production（DEBUG 关闭）
+DEBUG = os.environ.get('DJANGO_DEBUG', '1') == '1'
 
 ALLOWED_HOSTS = []
 
@@ -58,6 +60,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.db_router.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'campus_delivery.urls'
@@ -106,6 +109,25 @@ DATABASES = {
     }
 }
 
+# ✅ 只读副本：DATABASE_REPLICA_HOSTS=10.0.0.2,10.0.0.3（其余连接参数同主库）
+DATABASE_REPLICAS = []
+for _i, _host in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_HOSTS', '').split(',')), start=1):
+    DATABASES[f'replica{_i}'] = {**DATABASES['default'], 'HOST': _host.strip(), 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(f'replica{_i}')
+
+# 本地调试读写分离：DJANGO_DB=sqlite 使用两个 SQLite 文件（两个库需分别 migrate --database）
+if os.environ.get('DJANGO_DB') == 'sqlite':
+    DATABASES = {
+        'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': BASE_DIR / 'db.sqlite3'},
+        'replica1': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': BASE_DIR / 'db_replica.sqlite3',
+                     'TEST': {'MIRROR': 'default'}},
+    }
+    DATABASE_REPLICAS = ['replica1']
+
+DATABASE_ROUTERS = ['core.db_router.PrimaryReplicaRouter']
+DATABASE_REPLICA_STICKY_SECONDS = 5   # 写入后该客户端继续读主库的秒数
+DATABASE_REPLICA_RETRY_SECONDS = 30   # 副本连接失败后暂停使用的秒数
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -124,6 +146,37 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# ✅ 密码哈希策略：PASSWORD_HASHER_POLICY=scrypt|argon2|pbkdf2
+# 首选项用于新密码；其余哈希器保留用于校验旧密码，登录时自动升级为首选项
+PASSWORD_HASHER_POLICY = os.environ.get('PASSWORD_HASHER_POLICY', 'scrypt')
+
+_PASSWORD_HASHER_CHOICES = {
+    'scrypt': 'core.hashers.TunedScryptPasswordHasher',
+    'argon2': 'core.hashers.TunedArgon2PasswordHasher',  # 需要 argon2-cffi
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+}
+
+PASSWORD_HASHERS = [_PASSWORD_HASHER_CHOICES[PASSWORD_HASHER_POLICY]] + [
+    hasher for policy, hasher in _PASSWORD_HASHER_CHOICES.items() if policy != PASSWORD_HASHER_POLICY
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
+# 默认取 Django 的 scrypt 代价；需要更快登录时再通过环境变量显式调低
+PASSWORD_SCRYPT_N = int(os.environ.get('PASSWORD_SCRYPT_N', 2 ** 14))
+PASSWORD_SCRYPT_R = int(os.environ.get('PASSWORD_SCRYPT_R', 8))
+PASSWORD_SCRYPT_P = int(os.environ.get('PASSWORD_SCRYPT_P', 5))
+
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get('PASSWORD_ARGON2_TIME_COST', 2))
+PASSWORD_ARGON2_MEMORY_COST = int(os.environ.get('PASSWORD_ARGON2_MEMORY_COST', 65536))  # KiB
+PASSWORD_ARGON2_PARALLELISM = int(os.environ.get('PASSWORD_ARGON2_PARALLELISM', 1))
+
+# 每个进程同时进行的密码哈希数上限（0 表示 CPU 核数，适用于单进程部署）
+# gunicorn 多进程部署时由 gunicorn.conf.py 按 CPU 核数 / worker 数设置，见 core.hashers.get_hash_pool
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 0))
+
+AUTHENTICATION_BACKENDS = ['core.backends.PooledHashingBackend']
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/3.2/topics/i18n/
@@ -156,8 +209,57 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    # ✅ 公开接口的令牌桶预算（core.throttling.TokenBucketThrottle，按视图 throttle_scope 取用）
+    'DEFAULT_THROTTLE_RATES': {
+        'user_register': '10/hour',
+        'users': '120/min',
+        'message_create': '5/min',
+        'verify_qr': '30/min',
+    },
+    # ✅ 匿名限流按客户端 IP 计：0 表示直接使用 REMOTE_ADDR，忽略客户端可伪造的 X-Forwarded-For；
+    # 部署在 N 层反向代理之后时设为 N，取代理追加的真实客户端地址
+    'NUM_PROXIES': int(os.environ.get('DRF_NUM_PROXIES', 0)),
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # 限流计数单独一个本地缓存，避免被业务缓存挤出
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'throttle',
+    },
+}
+
+# ✅ Idempotency-Key 记录保留时间（core.idempotency），过期记录由 purge_idempotency_keys 清理
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+# 处理中记录的租约：超过该时长仍无响应视为进程已被杀死，相同 key 的重试可以接管（应大于 gunicorn timeout）
+IDEMPOTENCY_IN_FLIGHT_LEASE = timedelta(seconds=int(os.environ.get('IDEMPOTENCY_IN_FLIGHT_LEASE', 90)))
+
+# ✅ 预约配送时段（core.slots）：时间桶长度、每台机器人每个时段可接单数、约满时推荐的时段数
+# 时段容量 = 当前机器人总数 × DELIVERY_SLOT_ORDERS_PER_ROBOT（可在 DeliverySlot.capacity 单独覆盖）；
+# 尚未登记任何机器人时不限制预约数
+DELIVERY_SLOT_MINUTES = 30
+DELIVERY_SLOT_ORDERS_PER_ROBOT = 1
+DELIVERY_SLOT_SUGGESTIONS = 3
+
+# ✅ 二维码渲染（core.utils.render_qr_png / generate_qr_codes，下单时也使用）
+QR_MIN_ERROR_LEVEL = 'M'   # 最低纠错等级；不增大版本时自动提高
+QR_BOX_SIZE = 4            # 每个模块的像素数
+QR_BORDER = 4              # 静区宽度（模块数），规范要求不少于 4
+# 批量渲染（generate_qr_codes）使用的固定掩码，渲染快约 5 倍；None 为逐一评估 8 种掩码取最优
+# 下单生成的二维码始终自动选择掩码
+QR_BATCH_MASK_PATTERN = 0
+
+# ✅ 二维码上传限制：在 PIL 解码前拒绝过大的文件 / 像素数
+QR_UPLOAD_MAX_BYTES = 5 * 1024 * 1024
+QR_UPLOAD_MAX_PIXELS = 16_000_000
+
+# ✅ 二维码解码服务：为空时在 Web 进程内解码；设置后交给 manage.py run_qr_decoder 启动的独立服务
+QR_DECODE_SERVICE_URL = os.environ.get('QR_DECODE_SERVICE_URL', '')
+QR_DECODE_SERVICE_TIMEOUT = 5
+
 CORS_ALLOW_ALL_ORIGINS = True  # 或 CORS_ALLOWED_ORIGINS = ['http://localhost:3000']
 
 
@@ -0,0 +1,58 @@
+"""
+Production settings for campus_delivery.
+
+Used by gunicorn.conf.py. Everything not overridden here comes from
+campus_delivery.settings.
+"""
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import *  # noqa: F401,F403
+from .settings import SIMPLE_JWT, DATABASES
+
+# DEBUG 关闭：不再在 connection.queries 中累积每条 SQL
+DEBUG = False
+
+# 必须通过环境变量提供密钥：仓库中的开发密钥是公开的，不能用于签发 JWT / 二维码签名
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY')
+if not SECRET_KEY:
+    raise ImproperlyConfigured("生产环境必须设置 DJANGO_SECRET_KEY")
+SIMPLE_JWT = {**SIMPLE_JWT, 'SIGNING_KEY': SECRET_KEY}
+
+# 共享缓存：gunicorn 多个 worker 进程之间需要共享读主库粘滞（core.db_router）、
+# 未处理留言计数（core.inbox）与限流令牌桶，本地内存缓存各进程独立，不能用于生产
+if os.environ.get('REDIS_URL'):
+    _SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+    }
+elif os.environ.get('MEMCACHED_LOCATION'):
+    _SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',  # 需要 pymemcache
+        'LOCATION': os.environ['MEMCACHED_LOCATION'].split(','),
+    }
+else:
+    raise ImproperlyConfigured("生产环境必须设置 REDIS_URL 或 MEMCACHED_LOCATION（多进程共享缓存）")
+
+CACHES = {
+    'default': {**_SHARED_CACHE, 'KEY_PREFIX': 'campus'},
+    'throttle': {**_SHARED_CACHE, 'KEY_PREFIX': 'campus-throttle'},
+}
+
+ALLOWED_HOSTS = [h for h in os.environ.get('DJANGO_ALLOWED_HOSTS', '*').split(',') if h]
+
+# 长连接：每个 worker 线程复用数据库连接，避免每个请求重新握手
+for _alias in DATABASES:
+    DATABASES[_alias]['CONN_MAX_AGE'] = int(os.environ.get('DJANGO_CONN_MAX_AGE', 60))
+    DATABASES[_alias]['CONN_HEALTH_CHECKS'] = True
+
+STATIC_ROOT = BASE_DIR / 'staticfiles'  # noqa: F405
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {'console': {'class': 'logging.StreamHandler'}},
+    'root': {'handlers': ['console'], 'level': os.environ.get('DJANGO_LOG_LEVEL', 'WARNING')},
+}
@@ -0,0 +1,76 @@
+# core/archive.py
+
+import gzip
+import json
+from datetime import timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from .models import DeliveryOrder, ArchivedOrder
+
+# ✅ 归档时复制的字段（qr_code_url 不进入冷数据）
+ARCHIVE_FIELDS = [
+    'id', 'student_id', 'teacher_id', 'created_at',
+    'package_type', 'weight', 'fragile', 'description',
+    'pickup_building', 'pickup_instructions', 'delivery_building',
+    'delivery_speed', 'scheduled_date', 'scheduled_time', 'status',
+]
+
+
+def archivable_orders(days):
+    """
+    创建超过 days 天的已送达订单
+    订单表没有送达时间，按创建时间计：创建 N 天前、近期才送达的订单也会被归档。
+    归档订单仍可通过 /api/archive/orders/ 查询，且仍计入学生汇总的 delivered_count，
+    因此只影响数据存放位置，不影响学生能看到的内容
+    """
+    cutoff = timezone.now() - timedelta(days=days)
+    return DeliveryOrder.objects.filter(status='DELIVERED', created_at__lt=cutoff)
+
+
+def archive_delivered_orders(days, batch_size=1000, export_path=None, dry_run=False):
+    """
+    分批把已送达的旧订单移入 ArchivedOrder，可同时追加写入 gzip 压缩的 NDJSON 文件
+    每批在一个事务内 select_for_update 读取并锁定，只删除仍为已送达的行：
+    配送员并发把订单改回配送中时会等待本批提交，不会误删进行中的订单
+    内存占用只与 batch_size 有关
+    :return: 归档的订单数
+    """
+    queryset = archivable_orders(days).order_by('id')
+    if dry_run:
+        return queryset.count()
+
+    export = gzip.open(export_path, 'at', encoding='utf-8') if export_path else None
+    archived = 0
+    last_id = 0
+    try:
+        while True:
+            with transaction.atomic():
+                rows = list(
+                    queryset.filter(id__gt=last_id).select_for_update().values(*ARCHIVE_FIELDS)[:batch_size]
+                )
+                if not rows:
+                    break
+                last_id = rows[-1]['id']
+                ids = [row['id'] for row in rows]
+
+                ArchivedOrder.objects.bulk_create(
+                    [ArchivedOrder(**row) for row in rows],
+                    ignore_conflicts=True,
+                )
+                DeliveryOrder.objects.filter(id__in=ids, status='DELIVERED').delete()
+
+            if export:
+                for row in rows:
+                    export.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False))
+                    export.write('\n')
+                export.flush()
+
+            archived += len(rows)
+    finally:
+        if export:
+            export.close()
+
+    return archived
@@ -0,0 +1,41 @@
+# core/backends.py
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import check_password, make_password
+
+from .hashers import run_hashing
+
+User = get_user_model()
+
+
+class PooledHashingBackend(ModelBackend):
+    """
+    与 ModelBackend 行为一致，但密码校验 / 升级哈希放在有界线程池中执行
+    数据库读写仍在请求线程中完成
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        try:
+            user = User._default_manager.get_by_natural_key(username)
+        except User.DoesNotExist:
+            # 与存在用户时耗时一致，避免通过响应时间枚举用户名
+            run_hashing(make_password, password)
+            return None
+
+        needs_rehash = []
+        if not run_hashing(check_password, password, user.password, needs_rehash.append):
+            return None
+        if not self.user_can_authenticate(user):
+            return None
+
+        if needs_rehash:
+            # 首选哈希算法或参数已变更：登录时透明升级
+            user.password = run_hashing(make_password, password)
+            user.save(update_fields=['password'])
+        return user
@@ -0,0 +1,126 @@
+# core/db_router.py
+
+import contextvars
+import hashlib
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.utils import DatabaseError, OperationalError
+
+# ✅ 当前请求是否可以读副本，由 ReplicaRoutingMiddleware 设置
+_use_replica = contextvars.ContextVar('use_replica', default=False)
+# 当前请求已选定的只读库别名（None 表示尚未选择），在第一次读查询时才选定
+_read_alias = contextvars.ContextVar('read_alias', default=None)
+
+# 连接失败的副本在此时间点之前不再使用
+_replica_down_until = {}
+
+STICKY_CACHE_KEY = 'db_sticky_%s'
+
+
+def pick_replica():
+    """
+    随机选一个可连接的副本；全部不可用时返回 None（回退主库）
+    """
+    now = time.monotonic()
+    candidates = [alias for alias in settings.DATABASE_REPLICAS if _replica_down_until.get(alias, 0) <= now]
+    random.shuffle(candidates)
+    for alias in candidates:
+        try:
+            connections[alias].ensure_connection()
+            return alias
+        except OperationalError:
+            mark_replica_down(alias)
+    return None
+
+
+def mark_replica_down(alias):
+    """
+    DATABASE_REPLICA_RETRY_SECONDS 秒内不再选用该副本
+    """
+    _replica_down_until[alias] = time.monotonic() + settings.DATABASE_REPLICA_RETRY_SECONDS
+
+
+class PrimaryReplicaRouter:
+    """
+    写操作总是走 default；只读请求中的查询走副本，副本在第一次读查询时才选定并连接，
+    不查库的请求不会触碰副本
+    管理命令、shell 等非请求场景始终读主库
+    """
+
+    def db_for_read(self, model, **hints):
+        if not _use_replica.get():
+            return 'default'
+        alias = _read_alias.get()
+        if alias is None:
+            alias = pick_replica() or 'default'
+            _read_alias.set(alias)
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # 副本与主库是同一份数据
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
+
+
+def _client_ident(request):
+    auth = request.META.get('HTTP_AUTHORIZATION')
+    if auth:
+        return hashlib.sha256(auth.encode()).hexdigest()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+class ReplicaRoutingMiddleware:
+    """
+    GET/HEAD/OPTIONS 请求读副本；写请求之后的 DATABASE_REPLICA_STICKY_SECONDS 秒内，
+    同一客户端（按 Authorization 或 IP 区分）继续读主库，保证读到自己的写入
+    多进程部署时 default 缓存需为共享缓存，粘滞才能跨进程生效
+
+    副本在使用中断开（如持久连接在 CONN_MAX_AGE 内失效）导致视图抛出 OperationalError 时，
+    暂停使用该副本，并在主库上重新执行一次该只读请求
+    """
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        ident = _client_ident(request)
+        use_replica = bool(
+            settings.DATABASE_REPLICAS
+            and request.method in self.SAFE_METHODS
+            and not cache.get(STICKY_CACHE_KEY % ident)
+        )
+
+        # 每个请求开始时都重新设置；不在结束时复位，流式响应在返回后仍会继续查询
+        _use_replica.set(use_replica)
+        _read_alias.set(None)
+
+        response = self.get_response(request)
+
+        if request.method not in self.SAFE_METHODS and response.status_code < 400:
+            cache.set(STICKY_CACHE_KEY % ident, True, settings.DATABASE_REPLICA_STICKY_SECONDS)
+        return response
+
+    def process_exception(self, request, exception):
+        alias = _read_alias.get()
+        if not isinstance(exception, OperationalError) or alias not in settings.DATABASE_REPLICAS:
+            return None
+
+        mark_replica_down(alias)
+        try:
+            connections[alias].close()
+        except DatabaseError:
+            pass
+        # 只有安全方法会读副本，重新执行不会产生重复写入
+        _use_replica.set(False)
+        _read_alias.set(None)
+        return self.get_response(request)
@@ -0,0 +1,126 @@
+# core/exports.py
+
+import csv
+import json
+from datetime import datetime, time
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+# ✅ 导出字段（二维码大字段不导出）
+ORDER_EXPORT_FIELDS = [
+    'id', 'student__username', 'teacher__username', 'created_at', 'status',
+    'package_type', 'weight', 'fragile', 'description',
+    'pickup_building', 'pickup_instructions', 'delivery_building',
+    'delivery_speed', 'scheduled_date', 'scheduled_time',
+]
+MESSAGE_EXPORT_FIELDS = ['id', 'name', 'email', 'message', 'created_at', 'handled']
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class ExportParamError(ValueError):
+    pass
+
+
+class _Echo:
+    """
+    csv.writer 需要一个文件对象，这里直接把写入的行返回给生成器
+    """
+    def write(self, value):
+        return value
+
+
+def _parse_day(value, name, end=False):
+    day = parse_date(value) if value else None
+    if value and day is None:
+        raise ExportParamError(f"{name} 格式应为 YYYY-MM-DD")
+    if day is None:
+        return None
+    moment = datetime.combine(day, time.max if end else time.min)
+    return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+
+
+def _parse_cursor(value):
+    if not value:
+        return 0
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ExportParamError("after 必须是订单/留言 id")
+
+
+def filter_by_date_range(queryset, params):
+    """
+    ?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD 按 created_at 过滤（含两端）
+    """
+    date_from = _parse_day(params.get('date_from'), 'date_from')
+    date_to = _parse_day(params.get('date_to'), 'date_to', end=True)
+    if date_from:
+        queryset = queryset.filter(created_at__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(created_at__lte=date_to)
+    return queryset
+
+
+def filter_orders(queryset, params):
+    """
+    ?status=&building=（取件或投递楼栋）&date_from=&date_to=
+    """
+    status = params.get('status')
+    if status:
+        queryset = queryset.filter(status=status)
+
+    building = params.get('building')
+    if building:
+        queryset = queryset.filter(Q(pickup_building=building) | Q(delivery_building=building))
+
+    return filter_by_date_range(queryset, params)
+
+
+def iter_rows(queryset, fields, after=0, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    按 id 做键集分页逐批读取，内存只与 chunk_size 有关
+    （MySQL 驱动会把 .iterator() 的整个结果集缓存在客户端，因此不用它）
+    """
+    queryset = queryset.order_by('id').values_list(*fields)
+    last_id = after
+    while True:
+        rows = list(queryset.filter(id__gt=last_id)[:chunk_size])
+        if not rows:
+            return
+        yield from rows
+        last_id = rows[-1][0]
+
+
+def stream_csv(queryset, fields, after=0):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in iter_rows(queryset, fields, after):
+        yield writer.writerow(row)
+
+
+def stream_ndjson(queryset, fields, after=0):
+    for row in iter_rows(queryset, fields, after):
+        yield json.dumps(dict(zip(fields, row)), cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+EXPORT_FORMATS = {
+    'csv': (stream_csv, 'text/csv; charset=utf-8'),
+    'ndjson': (stream_ndjson, 'application/x-ndjson; charset=utf-8'),
+}
+
+
+def export_stream(queryset, fields, params):
+    """
+    解析 ?fmt=csv|ndjson&after=<id> 并返回 (生成器, content_type, 文件扩展名)
+    after 为上次导出收到的最后一个 id，用于断点续传
+    """
+    fmt = params.get('fmt', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        raise ExportParamError("fmt 只支持 csv 或 ndjson")
+    after = _parse_cursor(params.get('after'))
+    generator, content_type = EXPORT_FORMATS[fmt]
+    return generator(queryset, fields, after), content_type, fmt
@@ -0,0 +1,57 @@
+# core/hashers.py
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, ScryptPasswordHasher
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    """
+    scrypt 参数由 settings 决定，默认与 Django 相同（N=2^14, r=8, p=5）
+    参数变化后旧哈希会在下次登录时自动升级
+    """
+    work_factor = settings.PASSWORD_SCRYPT_N
+    block_size = settings.PASSWORD_SCRYPT_R
+    parallelism = settings.PASSWORD_SCRYPT_P
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    argon2 参数由 settings 决定（需要安装 argon2-cffi）
+    """
+    time_cost = settings.PASSWORD_ARGON2_TIME_COST
+    memory_cost = settings.PASSWORD_ARGON2_MEMORY_COST
+    parallelism = settings.PASSWORD_ARGON2_PARALLELISM
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_hash_pool():
+    """
+    进程内共享的有界哈希线程池，本进程同时进行的哈希数不超过 PASSWORD_HASH_WORKERS
+    （hashlib 计算时会释放 GIL，多个线程可以并行占用多个核）
+
+    上限按进程计算：gunicorn 下由 gunicorn.conf.py 按 CPU 核数 / worker 进程数分配，
+    所有进程合计同时进行的哈希数不超过 max(CPU 核数, worker 进程数)
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                workers = settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+                _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+    return _pool
+
+
+def run_hashing(func, *args, **kwargs):
+    """
+    在哈希线程池中执行 func 并等待结果；func 中不要访问数据库
+    调用方的请求线程会阻塞到哈希完成：线程池只限制 CPU 并发，
+    登录高峰时多出的请求在池中排队，而不是同时抢占 CPU
+    """
+    return get_hash_pool().submit(func, *args, **kwargs).result()
@@ -0,0 +1,125 @@
+# core/idempotency.py
+
+import functools
+import hashlib
+import json
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+
+def _scope(request):
+    if request.user and request.user.is_authenticated:
+        caller = f"user:{request.user.pk}"
+    else:
+        caller = f"ip:{request.META.get('REMOTE_ADDR', '')}"
+    return hashlib.sha256(f"{request.method}:{request.path}:{caller}".encode()).hexdigest()
+
+
+def _fingerprint(request):
+    """
+    请求体摘要：JSON 按键排序；表单 / multipart 逐字段，上传文件按内容
+    """
+    digest = hashlib.sha256()
+    if hasattr(request.data, 'lists'):
+        for name, values in sorted(request.data.lists(), key=lambda item: item[0]):
+            for value in values:
+                digest.update(f"{name}=".encode())
+                if hasattr(value, 'chunks'):
+                    for chunk in value.chunks():
+                        digest.update(chunk)
+                    value.seek(0)
+                else:
+                    digest.update(str(value).encode())
+                digest.update(b'\0')
+    else:
+        digest.update(json.dumps(request.data, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def expired_keys():
+    return IdempotencyKey.objects.filter(created_at__lt=timezone.now() - settings.IDEMPOTENCY_KEY_TTL)
+
+
+def _in_flight():
+    return Response({"detail": "相同 Idempotency-Key 的请求正在处理中"}, status=409)
+
+
+def _replay(record):
+    response = Response(record.response_body, status=record.response_status)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _owned(record):
+    """
+    只匹配仍由本请求持有租约的记录：租约被接管后 created_at 已变
+    """
+    return IdempotencyKey.objects.filter(pk=record.pk, created_at=record.created_at)
+
+
+def _take_over(record):
+    """
+    处理中记录超过 IDEMPOTENCY_IN_FLIGHT_LEASE 仍无响应：原进程已退出，
+    条件更新抢占租约，并发重试中只有一个能成功
+    """
+    now = timezone.now()
+    taken = _owned(record).filter(
+        response_status__isnull=True,
+        created_at__lt=now - settings.IDEMPOTENCY_IN_FLIGHT_LEASE,
+    ).update(created_at=now)
+    record.created_at = now
+    return taken == 1
+
+
+def idempotent(view_method):
+    """
+    视图方法装饰器：带 Idempotency-Key 头的重复请求直接返回首次的响应，
+    不再执行任何写入或二维码编解码；5xx / 异常不会被记录，可以重试
+    同一 key 携带不同请求体返回 422；处理中的记录在租约过期后可被重试接管
+    """
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > 255:
+            return Response({"detail": "Idempotency-Key 过长"}, status=400)
+
+        scope = _scope(request)
+        request_hash = _fingerprint(request)
+        expired_keys().filter(scope=scope, key=key).delete()
+
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(scope=scope, key=key, request_hash=request_hash)
+        except IntegrityError:
+            record = IdempotencyKey.objects.filter(scope=scope, key=key).first()
+            if record is None:
+                return _in_flight()
+            if record.request_hash != request_hash:
+                return Response({"detail": "Idempotency-Key 已用于不同的请求内容"}, status=422)
+            if record.response_status is not None:
+                return _replay(record)
+            if not _take_over(record):
+                return _in_flight()
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            _owned(record).delete()
+            raise
+
+        if response.status_code >= 500:
+            _owned(record).delete()
+        else:
+            _owned(record).update(response_status=response.status_code, response_body=response.data)
+        return response
+
+    return wrapper
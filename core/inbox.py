@@ -0,0 +1,33 @@
+# core/inbox.py
+
+from django.core.cache import cache
+
+from .models import Message
+
+UNREAD_CACHE_KEY = 'message_unread_count'
+# 本地内存缓存各进程独立，设置较短过期时间限制进程间的偏差
+UNREAD_CACHE_TIMEOUT = 60
+
+
+def unread_count():
+    count = cache.get(UNREAD_CACHE_KEY)
+    if count is None:
+        count = Message.objects.filter(handled=False).count()
+        cache.set(UNREAD_CACHE_KEY, count, UNREAD_CACHE_TIMEOUT)
+    return count
+
+
+def adjust_unread(delta):
+    """
+    增减未处理计数；缓存中没有时不做处理，下次读取会重新统计
+    """
+    if not delta:
+        return
+    try:
+        cache.incr(UNREAD_CACHE_KEY, delta)
+    except ValueError:
+        pass
+
+
+def reset_unread():
+    cache.delete(UNREAD_CACHE_KEY)
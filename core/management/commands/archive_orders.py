@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from core.archive import archive_delivered_orders
+
+
+class Command(BaseCommand):
+    help = "归档超过 N 天的已送达订单（建议由 cron 每日执行，如 0 3 * * * python manage.py archive_orders --days 90）"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=90, help='归档多少天前创建的已送达订单（按创建时间计，订单没有送达时间）')
+        parser.add_argument('--batch-size', type=int, default=1000, help='每批处理的订单数')
+        parser.add_argument('--export', dest='export_path', help='同时追加导出到该 .ndjson.gz 文件')
+        parser.add_argument('--dry-run', action='store_true', help='只统计待归档数量，不做修改')
+
+    def handle(self, *args, **options):
+        count = archive_delivered_orders(
+            days=options['days'],
+            batch_size=options['batch_size'],
+            export_path=options['export_path'],
+            dry_run=options['dry_run'],
+        )
+        if options['dry_run']:
+            self.stdout.write(f"待归档订单：{count}")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✅ 已归档订单：{count}"))
@@ -0,0 +1,89 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test.utils import override_settings, setup_databases, teardown_databases
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.views import TokenObtainPairView
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ("登录风暴基准：在临时测试库中并发走 /api/token/（或 authenticate()）完整登录路径，"
+            "报告各哈希器的 logins/sec 与每核 logins/sec")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=200, help='每个哈希器的登录次数')
+        parser.add_argument('--concurrency', type=int, default=os.cpu_count() or 1, help='并发线程数')
+        parser.add_argument('--users', type=int, default=20, help='参与登录的用户数（各自不同的盐）')
+        parser.add_argument('--hashers', default='default,pbkdf2_sha256',
+                            help='逗号分隔的哈希算法名，default 表示 PASSWORD_HASHERS 首选项')
+        parser.add_argument('--via', choices=['token', 'authenticate'], default='token',
+                            help='token：经 TokenObtainPairView；authenticate：直接调用认证后端')
+        parser.add_argument('--keepdb', action='store_true', help='保留测试库结构以加快下次运行')
+
+    def _login_token(self, username, password):
+        request = self.factory.post('/api/token/', {'username': username, 'password': password}, format='json')
+        return self.token_view(request).status_code == 200
+
+    def _login_authenticate(self, username, password):
+        return authenticate(username=username, password=password) is not None
+
+    def _run(self, usernames, password, logins, concurrency, login):
+        def worker(offset):
+            # 每个线程用自己的数据库连接，结束时关闭
+            try:
+                return sum(
+                    login(usernames[i % len(usernames)], password)
+                    for i in range(offset, logins, concurrency)
+                )
+            finally:
+                connections.close_all()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            ok = sum(pool.map(worker, range(concurrency)))
+        return ok, time.perf_counter() - start
+
+    def handle(self, *args, **options):
+        logins = options['logins']
+        concurrency = options['concurrency']
+        password = 'semester-start-2026'
+        login = self._login_token if options['via'] == 'token' else self._login_authenticate
+        self.factory = APIRequestFactory()
+        self.token_view = TokenObtainPairView.as_view()
+
+        # 哈希只在本进程的有界线程池中执行：可并行的核数取并发数、线程池大小与 CPU 核数的最小值
+        pool_workers = settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+        cores = min(concurrency, pool_workers, os.cpu_count() or 1)
+        self.stdout.write(f"经 {options['via']} 登录，并发 {concurrency}，哈希线程池可用核 {cores}，"
+                          f"每个哈希器 {logins} 次登录")
+
+        old_config = setup_databases(verbosity=0, interactive=False, keepdb=options['keepdb'])
+        try:
+            for algorithm in options['hashers'].split(','):
+                hasher = get_hasher(algorithm)
+                hasher_path = f'{type(hasher).__module__}.{type(hasher).__qualname__}'
+                # 被测哈希器设为首选项，避免登录时触发哈希升级
+                hashers = [hasher_path] + [h for h in settings.PASSWORD_HASHERS if h != hasher_path]
+
+                with override_settings(PASSWORD_HASHERS=hashers):
+                    users = User.objects.bulk_create([
+                        User(username=f'bench_{hasher.algorithm}_{i}', password=make_password(password))
+                        for i in range(options['users'])
+                    ])
+                    ok, elapsed = self._run([u.username for u in users], password, logins, concurrency, login)
+
+                rate = ok / elapsed
+                self.stdout.write(
+                    f"{hasher.algorithm:<16} {rate:8.1f} logins/sec  {rate / cores:8.1f} logins/sec/core  "
+                    f"{elapsed / logins * 1000 * concurrency:7.1f} ms/login  失败 {logins - ok}"
+                )
+        finally:
+            teardown_databases(old_config, verbosity=0, keepdb=options['keepdb'])
@@ -0,0 +1,44 @@
+import base64
+import os
+import time
+from urllib.parse import unquote
+
+from django.core.management.base import BaseCommand
+
+from core.utils import generate_qr_code, generate_qr_codes, generate_signed_payload
+
+
+def _image_bytes(uri):
+    header, body = uri.split(',', 1)
+    if header.endswith(';base64'):
+        return len(base64.b64decode(body))
+    return len(unquote(body).encode())
+
+
+class Command(BaseCommand):
+    help = "二维码渲染基准：对比 generate_qr_code 与批量渲染的 images/sec 和每张图片字节数"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=500, help='渲染的二维码数量')
+        parser.add_argument('--processes', type=int, default=os.cpu_count() or 1, help='批量渲染的进程数')
+
+    def _run(self, name, render, count):
+        start = time.perf_counter()
+        uris = render()
+        elapsed = time.perf_counter() - start
+        avg_bytes = sum(_image_bytes(uri) for uri in uris) / len(uris)
+        avg_uri = sum(len(uri) for uri in uris) / len(uris)
+        self.stdout.write(f"{name:<28} {count / elapsed:9.1f} images/sec  {avg_bytes:8.0f} bytes/image  "
+                          f"{avg_uri:8.0f} chars/data URI")
+
+    def handle(self, *args, **options):
+        count = options['count']
+        processes = options['processes']
+        payloads = [generate_signed_payload(order_id, 10000 + order_id) for order_id in range(1, count + 1)]
+
+        self.stdout.write(f"{count} 个二维码，批量渲染进程数 {processes}")
+        self._run('generate_qr_code', lambda: [generate_qr_code(p) for p in payloads], count)
+        self._run('batch png (1 process)', lambda: generate_qr_codes(payloads, 'png', processes=1), count)
+        self._run('batch svg (1 process)', lambda: generate_qr_codes(payloads, 'svg', processes=1), count)
+        if processes > 1:
+            self._run(f'batch png ({processes} processes)', lambda: generate_qr_codes(payloads, 'png', processes=processes), count)
@@ -0,0 +1,86 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_databases, teardown_databases
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.models import DeliveryOrder
+from core.simulation import BUILDINGS
+from core.views import DispatchOrderViewSet
+
+User = get_user_model()
+
+PACKAGE_TYPES = ['文件', '书籍', '快递', '外卖', '实验器材']
+WORDS = ['急件', '易碎', '教材', '签收', '周末', '实验', '报告', '打印']
+
+
+class Command(BaseCommand):
+    help = "订单检索基准：在临时测试库中造 N 条订单，实测 /api/dispatch/orders/search/ 的 p50/p95 延迟"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=100000, help='造数订单条数（目标场景为 1000000）')
+        parser.add_argument('--students', type=int, default=1000, help='学生数')
+        parser.add_argument('--queries', type=int, default=200, help='每组查询的请求次数')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--keepdb', action='store_true', help='保留测试库结构以加快下次运行')
+
+    def _seed(self, orders, students, rng):
+        users = User.objects.bulk_create([
+            User(username=f'bench_student_{i}', is_student=True) for i in range(students)
+        ])
+        batch = []
+        for i in range(orders):
+            pickup, delivery = rng.sample(BUILDINGS, 2)
+            batch.append(DeliveryOrder(
+                student=rng.choice(users),
+                package_type=rng.choice(PACKAGE_TYPES),
+                weight='1kg',
+                description=' '.join(rng.sample(WORDS, 2)),
+                pickup_building=pickup,
+                delivery_building=delivery,
+                delivery_speed='standard',
+                status=rng.choice(['PENDING', 'ASSIGNED', 'DELIVERING', 'DELIVERED']),
+            ))
+            if len(batch) == 5000:
+                DeliveryOrder.objects.bulk_create(batch)
+                batch = []
+        DeliveryOrder.objects.bulk_create(batch)
+
+    def _time(self, view, dispatcher, params, count):
+        factory = APIRequestFactory()
+        latencies = []
+        for _ in range(count):
+            request = factory.get('/api/dispatch/orders/search/', params)
+            force_authenticate(request, user=dispatcher)
+            start = time.perf_counter()
+            response = view(request)
+            latencies.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, response.data
+        latencies.sort()
+        return statistics.median(latencies), latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)]
+
+    def handle(self, *args, **options):
+        old_config = setup_databases(verbosity=0, interactive=False, keepdb=options['keepdb'])
+        try:
+            rng = random.Random(options['seed'])
+            start = time.perf_counter()
+            self._seed(options['orders'], options['students'], rng)
+            dispatcher = User.objects.create_user(username='bench_dispatcher', password=None, is_dispatcher=True)
+            self.stdout.write(f"{connection.vendor}：造数 {options['orders']} 条订单，耗时 {time.perf_counter() - start:.1f} 秒")
+
+            view = DispatchOrderViewSet.as_view({'get': 'search'})
+            cases = [
+                ('单词', {'q': '图书馆'}),
+                ('两个词', {'q': '图书馆 急件'}),
+                ('楼栋 + 用户名', {'q': '图书馆 bench_student_1'}),
+                ('单词 + 分面', {'q': '图书馆', 'facets': '1'}),
+            ]
+            for name, params in cases:
+                p50, p95 = self._time(view, dispatcher, params, options['queries'])
+                self.stdout.write(f"{name:<12} p50 {p50:7.2f} ms  p95 {p95:7.2f} ms")
+        finally:
+            teardown_databases(old_config, verbosity=0, keepdb=options['keepdb'])
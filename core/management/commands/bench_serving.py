@@ -0,0 +1,116 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+def _rss_kb(pid):
+    try:
+        for line in Path(f'/proc/{pid}/status').read_text().splitlines():
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def _children(pid):
+    children = []
+    for stat in Path('/proc').glob('[0-9]*/stat'):
+        try:
+            fields = stat.read_text().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(stat.parent.name))
+    return children
+
+
+class Command(BaseCommand):
+    help = ("对比 runserver（当前方式）与 gunicorn 生产配置的 requests/sec 和每个 worker 的 RSS（需要 Linux /proc）；"
+            "生产配置需要 DJANGO_SECRET_KEY 与 REDIS_URL / MEMCACHED_LOCATION 环境变量")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/', help='压测的 URL 路径')
+        parser.add_argument('--requests', type=int, default=2000, help='每个服务的请求数')
+        parser.add_argument('--concurrency', type=int, default=16, help='并发客户端数')
+        parser.add_argument('--workers', type=int, default=None, help='gunicorn worker 数（默认按 gunicorn.conf.py）')
+        parser.add_argument('--dev-settings', default=os.environ.get('DJANGO_SETTINGS_MODULE', 'campus_delivery.settings'))
+        parser.add_argument('--prod-settings', default='campus_delivery.settings_production')
+
+    def _wait_ready(self, url, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                urlopen(url, timeout=1).read()
+                return True
+            except HTTPError:
+                # HTTPError 是 URLError 的子类，须先捕获：已有响应（如 4xx）即视为启动完成
+                return True
+            except OSError:
+                # URLError、连接被重置等：服务尚未就绪
+                time.sleep(0.2)
+        return False
+
+    def _load(self, url, count, concurrency):
+        def hit(_):
+            try:
+                urlopen(url, timeout=10).read()
+                return True
+            except Exception:
+                return False
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            ok = sum(pool.map(hit, range(count)))
+        return ok, time.perf_counter() - start
+
+    def _bench(self, name, cmd, env, port, options):
+        proc = subprocess.Popen(cmd, env=env, cwd=settings.BASE_DIR,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+        url = f"http://127.0.0.1:{port}{options['path']}"
+        try:
+            if not self._wait_ready(url):
+                self.stderr.write(f"{name} 启动失败")
+                return
+            self._load(url, min(200, options['requests']), options['concurrency'])  # 预热
+            ok, elapsed = self._load(url, options['requests'], options['concurrency'])
+
+            workers = _children(proc.pid) or [proc.pid]
+            rss = [_rss_kb(pid) for pid in workers]
+            self.stdout.write(
+                f"{name:<10} {ok / elapsed:9.1f} req/s  失败 {options['requests'] - ok:<5} "
+                f"worker {len(workers)} 个  RSS/worker {sum(rss) / len(rss) / 1024:7.1f} MB  "
+                f"主进程 RSS {_rss_kb(proc.pid) / 1024:7.1f} MB"
+            )
+        finally:
+            os.killpg(proc.pid, signal.SIGTERM)
+            proc.wait(timeout=60)
+
+    def handle(self, *args, **options):
+        base_env = {k: v for k, v in os.environ.items() if k != 'DJANGO_SETTINGS_MODULE'}
+
+        self._bench(
+            'runserver',
+            [sys.executable, 'manage.py', 'runserver', '--noreload', '127.0.0.1:8701'],
+            {**base_env, 'DJANGO_SETTINGS_MODULE': options['dev_settings']},
+            8701, options,
+        )
+
+        gunicorn_env = {**base_env, 'DJANGO_SETTINGS_MODULE': options['prod_settings'],
+                        'GUNICORN_BIND': '127.0.0.1:8702'}
+        if options['workers']:
+            gunicorn_env['WEB_CONCURRENCY'] = str(options['workers'])
+        self._bench(
+            'gunicorn',
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py'],
+            gunicorn_env, 8702, options,
+        )
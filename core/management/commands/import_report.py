@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand
+
+# 需要关注是否在启动时被加载的重量级模块
+HEAVY_MODULES = ['PIL', 'pyzbar', 'qrcode', 'numpy']
+
+
+class Command(BaseCommand):
+    help = "用 python -X importtime 统计启动导入耗时（默认模拟 Web 进程加载 URL 配置）"
+
+    def add_arguments(self, parser):
+        parser.add_argument('modules', nargs='*', default=['campus_delivery.urls'], help='django.setup() 之后导入的模块')
+        parser.add_argument('--top', type=int, default=20, help='列出累计耗时最多的模块数')
+
+    def handle(self, *args, **options):
+        code = "import django; django.setup(); " + "; ".join(f"import {m}" for m in options['modules'])
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'campus_delivery.settings')}
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            env=env, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            self.stderr.write(result.stderr[-2000:])
+            return
+
+        # 每行格式：import time: self [us] | cumulative | imported package
+        rows = []
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            rows.append((int(cumulative_us), int(self_us), name.rstrip(), name.strip()))
+
+        total_us = sum(self_us for _, self_us, _, _ in rows)
+        loaded = {module for _, _, _, module in rows}
+        self.stdout.write(f"共导入 {len(rows)} 个模块，总耗时 {total_us / 1000:.1f} ms")
+
+        self.stdout.write(f"\n累计耗时最多的 {options['top']} 个模块：")
+        for cumulative_us, self_us, name, _ in sorted(rows, reverse=True)[:options['top']]:
+            self.stdout.write(f"{cumulative_us / 1000:9.1f} ms  {self_us / 1000:8.1f} ms  {name}")
+
+        self.stdout.write("\n重量级依赖：")
+        for module in HEAVY_MODULES:
+            cost = next((c for c, _, _, m in rows if m == module), None)
+            state = f"已加载（{cost / 1000:.1f} ms）" if cost is not None else "未加载"
+            self.stdout.write(f"  {module:<8} {state}")
+        if loaded & set(HEAVY_MODULES):
+            self.stdout.write(self.style.WARNING("⚠️ 启动时加载了重量级依赖，检查是否有模块级导入"))
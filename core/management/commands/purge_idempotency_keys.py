@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.idempotency import expired_keys
+
+
+class Command(BaseCommand):
+    help = "删除超过 IDEMPOTENCY_KEY_TTL 的 Idempotency-Key 记录（建议由 cron 定期执行）"
+
+    def handle(self, *args, **options):
+        deleted, _ = expired_keys().delete()
+        self.stdout.write(self.style.SUCCESS(f"✅ 已清理 Idempotency-Key 记录：{deleted}"))
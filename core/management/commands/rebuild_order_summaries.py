@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import DeliveryOrder
+from core.summaries import rebuild_student_summary
+
+
+class Command(BaseCommand):
+    help = "从订单表重建所有学生的订单汇总（上线时补数据或数据修复时执行）"
+
+    def handle(self, *args, **options):
+        student_ids = DeliveryOrder.objects.order_by().values_list('student_id', flat=True).distinct()
+        count = 0
+        for student_id in student_ids.iterator():
+            with transaction.atomic():
+                rebuild_student_summary(student_id)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"✅ 已重建学生汇总：{count}"))
@@ -0,0 +1,65 @@
+import base64
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.qr_decode import QRImageTooLarge, decode_local
+
+
+class QRDecodeHandler(BaseHTTPRequestHandler):
+    """
+    POST 图片原始字节，返回 {"results": [base64 编码的二维码内容, ...]}
+    """
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        # 长度缺失、非整数或为负时拒绝：rfile.read(-1) 会一直读到连接关闭
+        try:
+            length = int(self.headers['Content-Length'])
+        except (TypeError, ValueError):
+            length = -1
+        if length < 0:
+            return self._reply(411, {'error': 'length_required'})
+        if length > settings.QR_UPLOAD_MAX_BYTES:
+            return self._reply(413, {'error': 'too_large'})
+
+        try:
+            results = decode_local(BytesIO(self.rfile.read(length)))
+        except QRImageTooLarge:
+            return self._reply(413, {'error': 'too_large'})
+        except Exception as e:
+            return self._reply(400, {'error': f"{type(e).__name__}: {e}"})
+
+        self._reply(200, {'results': [base64.b64encode(item).decode() for item in results]})
+
+
+class Command(BaseCommand):
+    help = "启动独立的二维码解码服务（Web 进程设置 QR_DECODE_SERVICE_URL 后不再加载 PIL / libzbar）"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8100)
+
+    def handle(self, *args, **options):
+        # 预先加载解码库，避免首个请求承担加载耗时
+        import PIL.Image  # noqa: F401
+        import pyzbar.pyzbar  # noqa: F401
+
+        server = ThreadingHTTPServer((options['host'], options['port']), QRDecodeHandler)
+        self.stdout.write(f"✅ 二维码解码服务已启动：http://{options['host']}:{options['port']}/")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.test.utils import setup_databases, teardown_databases
+
+from core.simulation import DispatchSimulation, parse_distribution
+
+
+class Command(BaseCommand):
+    help = "在临时测试库中运行配送调度离散事件仿真，报告排队等待、机器人利用率与 API 吞吐"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=200, help='订单总数')
+        parser.add_argument('--robots', type=int, default=10, help='机器人数量')
+        parser.add_argument('--students', type=int, default=50, help='下单学生数')
+        parser.add_argument('--arrival', default='exp:60', help='订单到达间隔分布（秒），如 exp:60 / uniform:10,120')
+        parser.add_argument('--travel', default='uniform:300,900', help='单程配送时间分布（秒），如 normal:600,120')
+        parser.add_argument('--heartbeat', type=float, default=30, help='机器人心跳间隔（秒）')
+        parser.add_argument('--seed', type=int, default=None, help='随机种子，便于对比不同改动')
+        parser.add_argument('--keepdb', action='store_true', help='保留测试库结构以加快下次运行')
+
+    def handle(self, *args, **options):
+        old_config = setup_databases(verbosity=0, interactive=False, keepdb=options['keepdb'])
+        try:
+            report = DispatchSimulation(
+                orders=options['orders'],
+                robots=options['robots'],
+                students=options['students'],
+                arrival=parse_distribution(options['arrival']),
+                travel=parse_distribution(options['travel']),
+                heartbeat=options['heartbeat'],
+                seed=options['seed'],
+            ).run()
+        finally:
+            teardown_databases(old_config, verbosity=0, keepdb=options['keepdb'])
+
+        self.stdout.write(f"订单 {report['orders']}（已送达 {report['delivered']}），机器人 {report['robots']}，"
+                          f"仿真时长 {report['simulated_seconds'] / 60:.1f} 分钟，实际耗时 {report['wall_seconds']:.1f} 秒")
+        self.stdout.write(f"排队等待（秒）：平均 {report['wait_mean']:.1f}  p50 {report['wait_p50']:.1f}  "
+                          f"p95 {report['wait_p95']:.1f}  最大 {report['wait_max']:.1f}")
+        self.stdout.write(f"机器人利用率：{report['utilisation'] * 100:.1f}%")
+        self.stdout.write(f"预计空闲时间误差（返回时）：平均 {report['eta_error_mean']:.1f} 秒")
+        self.stdout.write(f"API：{report['api_calls']} 次调用，{report['api_throughput']:.1f} 次/秒")
+        for name, latency in report['api_latency_ms'].items():
+            self.stdout.write(f"  {name:<16} 平均 {latency:.2f} ms")
+        if report['api_errors']:
+            self.stdout.write(self.style.WARNING(f"API 错误：{report['api_errors']}"))
@@ -0,0 +1,55 @@
+# Generated by Django 5.2 on 2026-10-19 20:01
+
+from django.db import migrations, models
+
+
+def add_fulltext_index(apps, schema_editor):
+    # 仅 MySQL：ngram 解析器支持中文楼栋名/描述的全文检索
+    if schema_editor.connection.vendor != "mysql":
+        return
+    schema_editor.execute(
+        "ALTER TABLE core_deliveryorder ADD FULLTEXT INDEX core_order_search_ft "
+        "(description, package_type, pickup_building, delivery_building) WITH PARSER ngram"
+    )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "mysql":
+        return
+    schema_editor.execute("ALTER TABLE core_deliveryorder DROP INDEX core_order_search_ft")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_rename_content_message_message"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="deliveryorder",
+            name="delivery_building",
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name="deliveryorder",
+            name="pickup_building",
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name="deliveryorder",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("PENDING", "待分配"),
+                    ("ASSIGNED", "已装入机器人"),
+                    ("DELIVERING", "配送中"),
+                    ("DELIVERED", "已送达"),
+                ],
+                db_index=True,
+                default="PENDING",
+                max_length=20,
+            ),
+        ),
+        migrations.RunPython(add_fulltext_index, drop_fulltext_index),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2 on 2026-10-19 20:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0009_deliveryorder_search_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedOrder",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("created_at", models.DateTimeField()),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+                ("package_type", models.CharField(max_length=50)),
+                ("weight", models.CharField(max_length=20)),
+                ("fragile", models.BooleanField(default=False)),
+                ("description", models.TextField(blank=True, null=True)),
+                ("pickup_building", models.CharField(max_length=100)),
+                (
+                    "pickup_instructions",
+                    models.CharField(blank=True, max_length=255, null=True),
+                ),
+                ("delivery_building", models.CharField(max_length=100)),
+                ("delivery_speed", models.CharField(max_length=20)),
+                ("scheduled_date", models.DateField(blank=True, null=True)),
+                ("scheduled_time", models.TimeField(blank=True, null=True)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "待分配"),
+                            ("ASSIGNED", "已装入机器人"),
+                            ("DELIVERING", "配送中"),
+                            ("DELIVERED", "已送达"),
+                        ],
+                        default="DELIVERED",
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_orders",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "teacher",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="archived_assigned_orders",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["student", "-created_at"],
+                        name="core_archiv_student_d3fb8d_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-19 20:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_archivedorder"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="user",
+            name="is_dispatcher",
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AlterField(
+            model_name="user",
+            name="is_student",
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AlterField(
+            model_name="user",
+            name="is_teacher",
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-19 20:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0012_idempotencykey"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StudentOrderSummary",
+            fields=[
+                (
+                    "student",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="order_summary",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("pending_count", models.PositiveIntegerField(default=0)),
+                ("assigned_count", models.PositiveIntegerField(default=0)),
+                ("delivering_count", models.PositiveIntegerField(default=0)),
+                ("delivered_count", models.PositiveIntegerField(default=0)),
+                ("active_order_ids", models.JSONField(default=list)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
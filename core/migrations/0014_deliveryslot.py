@@ -0,0 +1,38 @@
+# Generated by Django 5.2 on 2026-10-19 20:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0013_studentordersummary"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeliverySlot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("start_time", models.TimeField()),
+                ("capacity", models.PositiveIntegerField()),
+                ("reserved", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("date", "start_time"), name="unique_delivery_slot"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-19 20:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0014_deliveryslot"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="message",
+            name="handled",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(fields=["-created_at", "-id"], name="message_inbox_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(
+                fields=["handled", "-created_at"], name="message_handled_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 20:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0015_message_inbox"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="idempotencykey",
+            name="request_hash",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-19 20:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def clear_frozen_capacity(apps, schema_editor):
+    # 已有记录的 capacity 是创建时的机器人数快照，不是人工设置的容量：改为按实时机器人数计算
+    apps.get_model("core", "DeliverySlot").objects.update(capacity=None)
+
+
+def freeze_capacity(apps, schema_editor):
+    robots = apps.get_model("core", "Robot").objects.count()
+    apps.get_model("core", "DeliverySlot").objects.filter(capacity__isnull=True).update(
+        capacity=robots * settings.DELIVERY_SLOT_ORDERS_PER_ROBOT
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0016_idempotencykey_request_hash"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="deliveryslot",
+            name="capacity",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(clear_frozen_capacity, freeze_capacity),
+    ]
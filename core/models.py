@@ -2,12 +2,13 @@ from django.db import models
 
 # Create your models here.
 from django.contrib.auth.models import AbstractUser
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
 class User(AbstractUser):
-    is_student = models.BooleanField(default=False)
-    is_teacher = models.BooleanField(default=False)
-    is_dispatcher = models.BooleanField(default=False)  # ✅ 快递管理员
+    is_student = models.BooleanField(default=False, db_index=True)
+    is_teacher = models.BooleanField(default=False, db_index=True)
+    is_dispatcher = models.BooleanField(default=False, db_index=True)  # ✅ 快递管理员
 
     def __str__(self):
         return self.username
@@ -32,9 +33,9 @@ class DeliveryOrder(models.Model):
     description = models.TextField(blank=True, null=True)
 
     # 🚚 取件与投递
-    pickup_building = models.CharField(max_length=100)
+    pickup_building = models.CharField(max_length=100, db_index=True)
     pickup_instructions = models.CharField(max_length=255, blank=True, null=True)
-    delivery_building = models.CharField(max_length=100)
+    delivery_building = models.CharField(max_length=100, db_index=True)
 
     # 🕓 配送调度
     delivery_speed = models.CharField(max_length=20)
@@ -42,7 +43,7 @@ class DeliveryOrder(models.Model):
     scheduled_time = models.TimeField(blank=True, null=True)
 
     # 📌 状态
-    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING', db_index=True)
 
     qr_code_url = models.TextField(blank=True, null=True)
 
@@ -51,6 +52,74 @@ class DeliveryOrder(models.Model):
 
 
 
+class StudentOrderSummary(models.Model):
+    """
+    学生订单汇总（反范式）：由订单写入路径在同一事务内维护，见 core.summaries
+    delivered_count 包含已归档订单
+    """
+    student = models.OneToOneField(User, primary_key=True, on_delete=models.CASCADE, related_name='order_summary')
+    pending_count = models.PositiveIntegerField(default=0)
+    assigned_count = models.PositiveIntegerField(default=0)
+    delivering_count = models.PositiveIntegerField(default=0)
+    delivered_count = models.PositiveIntegerField(default=0)
+    active_order_ids = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Order summary of {self.student_id}"
+
+
+class ArchivedOrder(models.Model):
+    """
+    已归档的已送达订单（冷数据）：主键沿用原订单 id，不保存二维码
+    """
+    id = models.BigIntegerField(primary_key=True)
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_orders')
+    teacher = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name='archived_assigned_orders')
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    package_type = models.CharField(max_length=50)
+    weight = models.CharField(max_length=20)
+    fragile = models.BooleanField(default=False)
+    description = models.TextField(blank=True, null=True)
+
+    pickup_building = models.CharField(max_length=100)
+    pickup_instructions = models.CharField(max_length=255, blank=True, null=True)
+    delivery_building = models.CharField(max_length=100)
+
+    delivery_speed = models.CharField(max_length=20)
+    scheduled_date = models.DateField(blank=True, null=True)
+    scheduled_time = models.TimeField(blank=True, null=True)
+
+    status = models.CharField(max_length=20, choices=DeliveryOrder.STATUS_CHOICES, default='DELIVERED')
+
+    class Meta:
+        indexes = [models.Index(fields=['student', '-created_at'])]
+
+    def __str__(self):
+        return f"Archived order #{self.id}"
+
+
+class DeliverySlot(models.Model):
+    """
+    预约配送时间桶：capacity 为该时段单独设置的可接单数，为空时按当前机器人数计算，
+    reserved 为已预约数；预约通过条件 UPDATE 原子占用，见 core.slots
+    """
+    date = models.DateField()
+    start_time = models.TimeField()
+    capacity = models.PositiveIntegerField(null=True, blank=True)
+    reserved = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'start_time'], name='unique_delivery_slot'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.start_time} ({self.reserved}/{'按机器人数' if self.capacity is None else self.capacity})"
+
+
 class Robot(models.Model):
     name = models.CharField(max_length=50)
     is_available = models.BooleanField(default=True)
@@ -67,8 +136,35 @@ class Message(models.Model):
     email = models.EmailField()
     message = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    handled = models.BooleanField(default=False)  # ✅ 管理员是否已处理
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='message_inbox_idx'),
+            models.Index(fields=['handled', '-created_at'], name='message_handled_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.email})"
 
 
+class IdempotencyKey(models.Model):
+    """
+    Idempotency-Key 请求记录：response_status 为空表示首个请求仍在处理中
+    scope 为 接口 + 调用者 的摘要，同一 key 在不同用户 / 接口之间互不影响
+    request_hash 为请求体摘要，同一 key 携带不同请求体会被拒绝
+    """
+    scope = models.CharField(max_length=64)
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64, blank=True, default='')
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='unique_idempotency_scope_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.key} ({self.response_status or '处理中'})"
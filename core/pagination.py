@@ -0,0 +1,32 @@
+# core/pagination.py
+
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+# ✅ 订单检索分页（配送员搜索）
+class OrderSearchPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+# ✅ 归档订单查询分页
+class ArchivedOrderPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+# ✅ 用户列表分页
+class UserPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+# ✅ 留言收件箱：按 (created_at, id) 键集分页，翻页不随页码变慢
+class MessageCursorPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
@@ -0,0 +1,55 @@
+# core/qr_decode.py
+
+import base64
+import json
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+
+
+class QRImageTooLarge(Exception):
+    pass
+
+
+def decode_local(fileobj):
+    """
+    在当前进程中解码二维码；PIL / pyzbar(libzbar) 只在第一次调用时加载
+    Image.open 只读取文件头，先检查像素数再解码
+    :return: 识别到的二维码原始内容（bytes）列表
+    """
+    from PIL import Image
+    from pyzbar.pyzbar import decode
+
+    img = Image.open(fileobj)
+    if img.width * img.height > settings.QR_UPLOAD_MAX_PIXELS:
+        raise QRImageTooLarge()
+    return [result.data for result in decode(img)]
+
+
+def decode_remote(content):
+    """
+    交给独立的二维码解码服务（manage.py run_qr_decoder）处理
+    """
+    request = Request(
+        settings.QR_DECODE_SERVICE_URL,
+        data=content,
+        headers={'Content-Type': 'application/octet-stream'},
+    )
+    try:
+        with urlopen(request, timeout=settings.QR_DECODE_SERVICE_TIMEOUT) as response:
+            body = json.loads(response.read())
+    except HTTPError as e:
+        if e.code == 413:
+            raise QRImageTooLarge()
+        raise
+    return [base64.b64decode(item) for item in body['results']]
+
+
+def decode_qr(fileobj):
+    """
+    配置了 QR_DECODE_SERVICE_URL 时远程解码，否则本地解码
+    """
+    if settings.QR_DECODE_SERVICE_URL:
+        return decode_remote(fileobj.read())
+    return decode_local(fileobj)
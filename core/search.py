@@ -0,0 +1,97 @@
+# core/search.py
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Count, FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.db.models.lookups import GreaterThan
+
+User = get_user_model()
+
+# ✅ 参与全文检索的订单字段（MySQL 下由 FULLTEXT 索引覆盖，见 0009 迁移）
+SEARCH_FIELDS = ('description', 'package_type', 'pickup_building', 'delivery_building')
+
+# 一个搜索词最多匹配多少个学生用户名（前缀匹配）
+USERNAME_MATCH_LIMIT = 50
+
+
+def _tokenize(q):
+    """
+    把搜索词按空白切分，去掉会破坏 BOOLEAN MODE 语法的引号
+    """
+    return [t.replace('"', '') for t in q.split() if t.replace('"', '')]
+
+
+def _fulltext_match(tokens):
+    """
+    MySQL：所有词都必须命中（+"词"），条件为 WHERE MATCH(...) AGAINST(...) > 0，走 ngram FULLTEXT 索引
+    MATCH 返回浮点相关度，不能当布尔值放进 Q（Django 会编译成 “= True”，即相关度恰好为 1）
+    """
+    against = ' '.join(f'+"{t}"' for t in tokens)
+    columns = ', '.join(f'core_deliveryorder.{field}' for field in SEARCH_FIELDS)
+    relevance = RawSQL(f"MATCH({columns}) AGAINST (%s IN BOOLEAN MODE)", [against], output_field=FloatField())
+    return Q(GreaterThan(relevance, 0))
+
+
+def _contains_match(tokens):
+    """
+    其他数据库（如本地 SQLite）：逐词 icontains，结果与 MySQL 一致但不走索引
+    """
+    condition = Q()
+    for token in tokens:
+        token_q = Q()
+        for field in SEARCH_FIELDS:
+            token_q |= Q(**{f'{field}__icontains': token})
+        condition &= token_q
+    return condition
+
+
+def _text_match(tokens):
+    if connection.vendor == 'mysql':
+        return _fulltext_match(tokens)
+    return _contains_match(tokens)
+
+
+def search_orders(queryset, q):
+    """
+    按关键字检索订单：每个词须命中包裹/楼栋字段或学生用户名前缀，各词之间为“且”
+
+    先用 username 唯一索引查出每个词匹配的学生；不匹配任何用户名的词合并成
+    一个全文条件（MySQL 下即单个 MATCH，可直接使用 FULLTEXT 索引），只有匹配到
+    用户名的词才需要 “全文 OR student_id IN (...)” 的组合条件
+    """
+    tokens = _tokenize(q or '')
+    if not tokens:
+        return queryset
+
+    condition = Q()
+    text_only = []
+    for token in tokens:
+        student_ids = list(
+            User.objects.filter(username__istartswith=token).values_list('id', flat=True)[:USERNAME_MATCH_LIMIT]
+        )
+        if student_ids:
+            condition &= _text_match([token]) | Q(student_id__in=student_ids)
+        else:
+            text_only.append(token)
+
+    if text_only:
+        condition &= _text_match(text_only)
+    return queryset.filter(condition)
+
+
+def _facet(queryset, field):
+    rows = queryset.order_by().values(field).annotate(count=Count('id'))
+    return {row[field]: row['count'] for row in rows}
+
+
+def order_facets(queryset):
+    """
+    统计当前结果集的分面计数：状态、取件楼栋、投递楼栋
+    三次 GROUP BY 与结果集大小成正比，因此只在请求 ?facets=1 时计算
+    """
+    return {
+        'status': _facet(queryset, 'status'),
+        'pickup_building': _facet(queryset, 'pickup_building'),
+        'delivery_building': _facet(queryset, 'delivery_building'),
+    }
@@ -1,11 +1,13 @@
 # core/serializers.py
 
 from rest_framework import serializers
-from .models import User, DeliveryOrder, Robot, Message
+from .models import User, DeliveryOrder, Robot, Message, ArchivedOrder, StudentOrderSummary
 from django.contrib.auth import get_user_model
 from datetime import date, datetime
 from django.utils import timezone
 from django.contrib.auth.hashers import make_password
+from .hashers import run_hashing
+from .slots import SlotCalendar, slot_key, suggested_slots
 
 
 
@@ -28,7 +30,13 @@ class UserSerializer(serializers.ModelSerializer):
         }
 
     def create(self, validated_data):
-        user = User.objects.create_user(**validated_data)
+        # 等价于 create_user，但密码哈希在有界线程池中计算（未提供密码时为不可用密码）
+        password = validated_data.pop('password', None)
+        user = User(**validated_data)
+        user.username = User.normalize_username(user.username)
+        user.email = User.objects.normalize_email(user.email)
+        user.password = run_hashing(make_password, password)
+        user.save()
         return user
 
     def update(self, instance, validated_data):
@@ -39,12 +47,30 @@ class UserSerializer(serializers.ModelSerializer):
             setattr(instance, attr, value)
 
         if password:
-            instance.password = make_password(password)
+            instance.password = run_hashing(make_password, password)
 
         instance.save()
         return instance
 
 
+# ✅ 用户列表 / me 实际读取的字段，供 only() 投影使用
+USER_PUBLIC_FIELDS = ['id', 'username', 'email', 'first_name', 'last_name', 'is_student', 'is_teacher', 'is_dispatcher']
+
+
+def slot_full_error(scheduled_date, scheduled_time, calendar=None):
+    """
+    时段已约满：附带最近的可预约时段
+    """
+    if calendar is not None:
+        suggestions = [t.strftime('%H:%M') for t in calendar.nearest_free(scheduled_time)]
+    else:
+        suggestions = suggested_slots(scheduled_date, scheduled_time)
+    return serializers.ValidationError({
+        "scheduled_time": ["该时段预约已满"],
+        "suggested_slots": suggestions,
+    })
+
+
 class DeliveryOrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = DeliveryOrder
@@ -68,6 +94,19 @@ class DeliveryOrderSerializer(serializers.ModelSerializer):
                 if scheduled_time < now_time:
                     raise serializers.ValidationError("预约时间不能早于当前时间")
 
+        # 时段容量预检（真正占用在 perform_create / perform_update 中原子完成）
+        # 更新时只有换了时段才检查：订单自己占用的名额不算冲突
+        scheduled_date = data.get('scheduled_date', getattr(self.instance, 'scheduled_date', None))
+        scheduled_time = data.get('scheduled_time', getattr(self.instance, 'scheduled_time', None))
+        new_slot = slot_key(scheduled_date, scheduled_time)
+        if new_slot and (
+            self.instance is None
+            or new_slot != slot_key(self.instance.scheduled_date, self.instance.scheduled_time)
+        ):
+            calendar = SlotCalendar.load(scheduled_date)
+            if not calendar.is_free(scheduled_time):
+                raise slot_full_error(scheduled_date, scheduled_time, calendar)
+
         return data
 
     def to_representation(self, instance):
@@ -79,6 +118,42 @@ class DeliveryOrderSerializer(serializers.ModelSerializer):
         return rep
 
 
+class OrderSearchResultSerializer(serializers.ModelSerializer):
+    """
+    配送员检索结果：不返回二维码大字段，附带学生用户名
+    """
+    student_username = serializers.CharField(source='student.username', read_only=True)
+
+    class Meta:
+        model = DeliveryOrder
+        fields = [
+            'id', 'student', 'student_username', 'teacher', 'created_at',
+            'package_type', 'weight', 'fragile', 'description',
+            'pickup_building', 'delivery_building', 'delivery_speed',
+            'scheduled_date', 'scheduled_time', 'status',
+        ]
+
+
+class ArchivedOrderSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedOrder
+        fields = '__all__'
+
+    def to_representation(self, instance):
+        rep = super().to_representation(instance)
+        rep['fragile'] = "是" if instance.fragile else "否"
+        return rep
+
+
+class StudentOrderSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = StudentOrderSummary
+        fields = [
+            'pending_count', 'assigned_count', 'delivering_count', 'delivered_count',
+            'active_order_ids', 'updated_at',
+        ]
+
+
 class RobotSerializer(serializers.ModelSerializer):
     class Meta:
         model = Robot
@@ -86,9 +161,20 @@ class RobotSerializer(serializers.ModelSerializer):
 
 
 class MessageSerializer(serializers.ModelSerializer):
+    """
+    公开提交留言：handled 只读，新留言总是未处理
+    """
     class Meta:
         model = Message
-        fields = ['id', 'name', 'email', 'message', 'created_at']
+        fields = ['id', 'name', 'email', 'message', 'created_at', 'handled']
+        read_only_fields = ['id', 'created_at', 'handled']
+
+
+class MessageAdminSerializer(MessageSerializer):
+    """
+    管理员查看 / 处理留言：可以修改 handled
+    """
+    class Meta(MessageSerializer.Meta):
         read_only_fields = ['id', 'created_at']
 
 
@@ -0,0 +1,267 @@
+# core/simulation.py
+
+import heapq
+import random
+import statistics
+import time as wall_time
+from collections import defaultdict, deque
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from .models import DeliveryOrder, Robot
+from .views import DeliveryOrderViewSet, DispatchOrderViewSet
+
+User = get_user_model()
+
+# 事件类型
+ARRIVAL = 'arrival'
+DELIVERED = 'delivered'
+RETURNED = 'returned'
+HEARTBEAT = 'heartbeat'
+
+BUILDINGS = ['图书馆', '教学楼A', '教学楼B', '实验楼', '宿舍1号楼', '宿舍2号楼', '食堂']
+
+
+def _distribution(rng, spec):
+    """
+    spec 形如 ('exp', 均值) / ('uniform', 最小, 最大) / ('normal', 均值, 标准差) / ('const', 值)
+    """
+    kind, *args = spec
+    if kind == 'exp':
+        return rng.expovariate(1 / args[0])
+    if kind == 'uniform':
+        return rng.uniform(args[0], args[1])
+    if kind == 'normal':
+        return max(rng.gauss(args[0], args[1]), 0)
+    if kind == 'const':
+        return args[0]
+    raise ValueError(f"未知分布：{kind}")
+
+
+def _mean(spec):
+    kind, *args = spec
+    if kind == 'uniform':
+        return (args[0] + args[1]) / 2
+    return args[0]
+
+
+def parse_distribution(text):
+    """
+    命令行格式：exp:60 / uniform:300,900 / normal:600,120 / const:600
+    """
+    kind, _, params = text.partition(':')
+    return (kind, *[float(p) for p in params.split(',') if p])
+
+
+class ApiDriver:
+    """
+    通过 APIRequestFactory 直接调用 core.views 中的真实视图，并记录耗时
+    """
+
+    def __init__(self):
+        self.factory = APIRequestFactory()
+        self.create_order = DeliveryOrderViewSet.as_view({'post': 'create'})
+        self.assign_order = DeliveryOrderViewSet.as_view({'put': 'update'})
+        self.dispatch_order = DispatchOrderViewSet.as_view({'patch': 'partial_update'})
+        self.latencies = defaultdict(list)
+
+    def _call(self, name, view, request, **kwargs):
+        start = wall_time.perf_counter()
+        response = view(request, **kwargs)
+        self.latencies[name].append(wall_time.perf_counter() - start)
+        return response
+
+    def create(self, student, data):
+        request = self.factory.post('/api/orders/', data, format='json')
+        force_authenticate(request, user=student)
+        return self._call('create_order', self.create_order, request)
+
+    def assign(self, teacher, order_id):
+        request = self.factory.put(f'/api/orders/{order_id}/', {}, format='json')
+        force_authenticate(request, user=teacher)
+        return self._call('assign_order', self.assign_order, request, pk=order_id)
+
+    def set_status(self, dispatcher, order_id, new_status):
+        request = self.factory.patch(f'/api/dispatch/orders/{order_id}/', {'status': new_status}, format='json')
+        force_authenticate(request, user=dispatcher)
+        return self._call('dispatch_status', self.dispatch_order, request, pk=order_id)
+
+
+class DispatchSimulation:
+    """
+    离散事件仿真：订单按到达分布产生，空闲机器人按 FIFO 接单，
+    送达后按返程时间回到空闲；仿真时钟与真实时间无关，只有 API 调用耗时是实测的
+    派单时按配送时间分布的均值预估 next_available_time，之后的心跳按机器人实际进度修正
+    """
+
+    def __init__(self, orders, robots, students=50, arrival=('exp', 60), travel=('uniform', 300, 900),
+                 heartbeat=30, seed=None):
+        self.order_count = orders
+        self.robot_count = robots
+        self.student_count = students
+        self.arrival = arrival
+        self.travel = travel
+        self.heartbeat = heartbeat
+        self.rng = random.Random(seed)
+
+        self.api = ApiDriver()
+        self.events = []
+        self._seq = 0
+        self.now = 0.0
+        self.last_event_at = 0.0    # 最后一个非心跳事件的时间，即完工时间
+        self.epoch = timezone.now()
+
+        self.queue = deque()        # 等待分配的订单 id
+        self.submitted = 0
+        self.idle_robots = 0
+        self.arrived_at = {}
+        self.wait_times = []
+        self.busy_since = {}
+        self.busy_time = defaultdict(float)
+        self.returns_at = {}        # 忙碌机器人的实际返回时间（仿真秒）
+        self.eta_errors = []        # 返回时 next_available_time 与实际返回时间之差（秒）
+        self.api_errors = defaultdict(int)
+
+    def _schedule(self, delay, kind, payload=None):
+        self._seq += 1
+        heapq.heappush(self.events, (self.now + delay, self._seq, kind, payload))
+
+    def _sim_datetime(self, t):
+        return self.epoch + timedelta(seconds=t)
+
+    def _setup(self):
+        self.teacher = User.objects.create_user(username='sim_teacher', password=None, is_teacher=True)
+        self.dispatcher = User.objects.create_user(username='sim_dispatcher', password=None, is_dispatcher=True)
+        self.students = [
+            User.objects.create_user(username=f'sim_student_{i}', password=None, is_student=True)
+            for i in range(self.student_count)
+        ]
+        Robot.objects.bulk_create([Robot(name=f'sim-robot-{i}') for i in range(self.robot_count)])
+        self.idle_robots = self.robot_count
+
+    def _order_payload(self):
+        pickup, delivery = self.rng.sample(BUILDINGS, 2)
+        return {
+            'package_type': self.rng.choice(['文件', '书籍', '快递', '外卖']),
+            'weight': f"{self.rng.uniform(0.1, 5):.1f}kg",
+            'fragile': self.rng.random() < 0.1,
+            'pickup_building': pickup,
+            'delivery_building': delivery,
+            'delivery_speed': 'standard',
+        }
+
+    def _on_arrival(self, _):
+        self.submitted += 1
+        response = self.api.create(self.rng.choice(self.students), self._order_payload())
+        if response.status_code != 201:
+            self.api_errors['create_order'] += 1
+        else:
+            order_id = response.data['id']
+            self.arrived_at[order_id] = self.now
+            self.queue.append(order_id)
+
+        if self.submitted < self.order_count:
+            self._schedule(_distribution(self.rng, self.arrival), ARRIVAL)
+
+    def _dispatch_waiting(self):
+        while self.queue and self.idle_robots:
+            order_id = self.queue.popleft()
+            response = self.api.assign(self.teacher, order_id)
+            if response.status_code != 200:
+                self.api_errors['assign_order'] += 1
+                continue
+
+            robot = Robot.objects.get(current_order_id=order_id)
+            self.idle_robots -= 1
+            self.busy_since[robot.id] = self.now
+            self.wait_times.append(self.now - self.arrived_at[order_id])
+
+            if self.api.set_status(self.dispatcher, order_id, 'DELIVERING').status_code != 200:
+                self.api_errors['dispatch_status'] += 1
+
+            outbound = _distribution(self.rng, self.travel)
+            self.returns_at[robot.id] = self.now + outbound * 2
+            # 派单时还不知道实际路况：按平均往返时间预估
+            Robot.objects.filter(pk=robot.pk).update(
+                next_available_time=self._sim_datetime(self.now + _mean(self.travel) * 2),
+            )
+            self._schedule(outbound, DELIVERED, (robot.id, order_id, outbound))
+
+    def _on_delivered(self, payload):
+        robot_id, order_id, outbound = payload
+        if self.api.set_status(self.dispatcher, order_id, 'DELIVERED').status_code != 200:
+            self.api_errors['dispatch_status'] += 1
+        # 返程与去程同样耗时
+        self._schedule(outbound, RETURNED, robot_id)
+
+    def _on_returned(self, robot_id):
+        estimate = Robot.objects.filter(pk=robot_id).values_list('next_available_time', flat=True).get()
+        self.eta_errors.append(abs((estimate - self._sim_datetime(self.now)).total_seconds()))
+        del self.returns_at[robot_id]
+        Robot.objects.filter(pk=robot_id).update(
+            is_available=True, current_order=None, next_available_time=None,
+        )
+        self.busy_time[robot_id] += self.now - self.busy_since.pop(robot_id)
+        self.idle_robots += 1
+
+    def _on_heartbeat(self, _):
+        # 机器人心跳：忙碌中的机器人上报实际进度，据此把预计空闲时间修正为实际返回时间
+        estimates = dict(
+            Robot.objects.filter(pk__in=self.returns_at).values_list('id', 'next_available_time')
+        )
+        for robot_id, returns_at in self.returns_at.items():
+            actual = self._sim_datetime(returns_at)
+            if estimates.get(robot_id) != actual:
+                Robot.objects.filter(pk=robot_id).update(next_available_time=actual)
+        if self.events:
+            self._schedule(self.heartbeat, HEARTBEAT)
+
+    def run(self):
+        self._setup()
+        handlers = {
+            ARRIVAL: self._on_arrival,
+            DELIVERED: self._on_delivered,
+            RETURNED: self._on_returned,
+            HEARTBEAT: self._on_heartbeat,
+        }
+        self._schedule(0, ARRIVAL)
+        self._schedule(self.heartbeat, HEARTBEAT)
+
+        started = wall_time.perf_counter()
+        while self.events:
+            self.now, _, kind, payload = heapq.heappop(self.events)
+            if kind != HEARTBEAT:
+                self.last_event_at = self.now
+            handlers[kind](payload)
+            self._dispatch_waiting()
+        return self.report(wall_time.perf_counter() - started)
+
+    def report(self, wall_seconds):
+        # 最后一个心跳可能晚于最后一次返回，不计入仿真时长
+        makespan = self.last_event_at or 1
+        waits = sorted(self.wait_times) or [0]
+        api_calls = sum(len(v) for v in self.api.latencies.values())
+        api_seconds = sum(sum(v) for v in self.api.latencies.values()) or 1
+
+        return {
+            'orders': len(self.wait_times),
+            'robots': self.robot_count,
+            'simulated_seconds': makespan,
+            'wait_mean': statistics.fmean(waits),
+            'wait_p50': waits[len(waits) // 2],
+            'wait_p95': waits[min(int(len(waits) * 0.95), len(waits) - 1)],
+            'wait_max': waits[-1],
+            'utilisation': sum(self.busy_time.values()) / (makespan * self.robot_count),
+            'eta_error_mean': statistics.fmean(self.eta_errors) if self.eta_errors else 0,
+            'api_calls': api_calls,
+            'api_throughput': api_calls / api_seconds,
+            'api_latency_ms': {
+                name: statistics.fmean(values) * 1000 for name, values in self.api.latencies.items()
+            },
+            'api_errors': dict(self.api_errors),
+            'wall_seconds': wall_seconds,
+            'delivered': DeliveryOrder.objects.filter(status='DELIVERED').count(),
+        }
@@ -0,0 +1,144 @@
+# core/slots.py
+
+from array import array
+from datetime import time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import DeliverySlot, Robot
+
+
+def slots_per_day():
+    return 24 * 60 // settings.DELIVERY_SLOT_MINUTES
+
+
+def slot_index(t):
+    return (t.hour * 60 + t.minute) // settings.DELIVERY_SLOT_MINUTES
+
+
+def slot_start(index):
+    minutes = index * settings.DELIVERY_SLOT_MINUTES
+    return time(minutes // 60, minutes % 60)
+
+
+def slot_key(day, t):
+    """
+    (日期, 时间桶)；未预约时间时为 None，用于判断订单是否换了时段
+    """
+    if day and t:
+        return day, slot_index(t)
+    return None
+
+
+# 容量表中表示“不限容量”的值
+UNLIMITED = 2 ** 32 - 1
+
+
+def fleet_capacity():
+    """
+    未单独设置容量的时段按当前机器人总数 × 每台每时段单数计，随机器人增减实时变化
+    没有登记任何机器人时返回 None：不做容量控制，预约只计数
+    """
+    robots = Robot.objects.count()
+    if not robots:
+        return None
+    return robots * settings.DELIVERY_SLOT_ORDERS_PER_ROBOT
+
+
+class SlotCalendar:
+    """
+    一天的紧凑容量表：remaining[i] 为第 i 个时间桶的剩余可预约数（UNLIMITED 表示不限）
+    一次查询载入当天所有已有时段；未设置容量的时段按机器人总数计
+    """
+
+    def __init__(self, day, capacity, rows=()):
+        self.day = day
+        default = UNLIMITED if capacity is None else capacity
+        self.capacity = array('I', [default] * slots_per_day())
+        self.remaining = array('I', self.capacity)
+        for start_time, slot_capacity, reserved in rows:
+            i = slot_index(start_time)
+            if slot_capacity is not None:
+                self.capacity[i] = slot_capacity
+            if self.capacity[i] != UNLIMITED:
+                self.remaining[i] = max(self.capacity[i] - reserved, 0)
+
+    @classmethod
+    def load(cls, day):
+        rows = DeliverySlot.objects.filter(date=day).values_list('start_time', 'capacity', 'reserved')
+        return cls(day, fleet_capacity(), rows)
+
+    def _first_open_index(self):
+        # 当天已过去的时段不可预约
+        now = timezone.localtime()
+        if self.day != now.date():
+            return 0
+        return slot_index(now.time()) + 1
+
+    def is_free(self, t):
+        return self.remaining[slot_index(t)] > 0
+
+    def nearest_free(self, t, limit=None):
+        """
+        离 t 最近的有剩余容量的时段（先近后远，同距离先早后晚）
+        """
+        limit = limit or settings.DELIVERY_SLOT_SUGGESTIONS
+        origin = slot_index(t)
+        first_open = self._first_open_index()
+        found = []
+        for distance in range(1, len(self.remaining)):
+            for i in (origin - distance, origin + distance):
+                if first_open <= i < len(self.remaining) and self.remaining[i] > 0:
+                    found.append(slot_start(i))
+                    if len(found) == limit:
+                        return found
+        return found
+
+    def as_list(self):
+        first_open = self._first_open_index()
+        return [
+            {
+                'start_time': slot_start(i).strftime('%H:%M'),
+                'capacity': None if self.capacity[i] == UNLIMITED else self.capacity[i],
+                'remaining': None if self.remaining[i] == UNLIMITED else self.remaining[i],
+            }
+            for i in range(first_open, len(self.remaining))
+        ]
+
+
+def _get_or_create_slot(day, start_time):
+    try:
+        with transaction.atomic():
+            return DeliverySlot.objects.get_or_create(date=day, start_time=start_time)[0]
+    except IntegrityError:
+        # 并发创建同一时段
+        return DeliverySlot.objects.get(date=day, start_time=start_time)
+
+
+def reserve_slot(day, t):
+    """
+    原子占用 t 所在时段的一个名额；已约满返回 False
+    容量取该时段单独设置的 capacity，否则取当前机器人总数对应的容量
+    """
+    slot = _get_or_create_slot(day, slot_start(slot_index(t)))
+    fleet = fleet_capacity()
+    if fleet is None:
+        has_room = Q(capacity__isnull=True) | Q(reserved__lt=F('capacity'))
+    else:
+        has_room = Q(reserved__lt=Coalesce(F('capacity'), Value(fleet)))
+    updated = DeliverySlot.objects.filter(has_room, pk=slot.pk).update(reserved=F('reserved') + 1)
+    return updated == 1
+
+
+def release_slot(day, t):
+    DeliverySlot.objects.filter(
+        date=day, start_time=slot_start(slot_index(t)), reserved__gt=0,
+    ).update(reserved=F('reserved') - 1)
+
+
+def suggested_slots(day, t):
+    return [s.strftime('%H:%M') for s in SlotCalendar.load(day).nearest_free(t)]
@@ -0,0 +1,65 @@
+# core/summaries.py
+
+from django.db.models import Count
+
+from .models import DeliveryOrder, ArchivedOrder, StudentOrderSummary
+
+ACTIVE_STATUSES = ('PENDING', 'ASSIGNED', 'DELIVERING')
+
+
+def _count_field(status):
+    return f"{status.lower()}_count"
+
+
+def rebuild_student_summary(student_id):
+    """
+    从订单表重新计算某个学生的汇总（补数据 / 汇总缺失时使用）
+    结果会写回主库，因此始终读主库，不受只读副本延迟影响
+    """
+    counts = dict(
+        DeliveryOrder.objects.using('default').filter(student_id=student_id)
+        .order_by().values_list('status').annotate(n=Count('id'))
+    )
+    counts['DELIVERED'] = counts.get('DELIVERED', 0) + ArchivedOrder.objects.using('default').filter(student_id=student_id).count()
+    active_ids = list(
+        DeliveryOrder.objects.using('default').filter(student_id=student_id, status__in=ACTIVE_STATUSES)
+        .order_by('id').values_list('id', flat=True)
+    )
+
+    defaults = {_count_field(status): counts.get(status, 0) for status, _ in DeliveryOrder.STATUS_CHOICES}
+    defaults['active_order_ids'] = active_ids
+    summary, _ = StudentOrderSummary.objects.update_or_create(student_id=student_id, defaults=defaults)
+    return summary
+
+
+def record_status_change(student_id, order_id, old_status, new_status):
+    """
+    订单写入后调用，须与订单写入处于同一事务（transaction.atomic）中，
+    old_status 须取自该事务内 select_for_update 读到的订单行
+    old_status 为 None 表示新建订单，new_status 为 None 表示删除订单
+    """
+    if old_status == new_status:
+        return
+
+    summary = StudentOrderSummary.objects.select_for_update().filter(student_id=student_id).first()
+    if summary is None:
+        # 首次访问：直接从订单表计算，已包含本次变更
+        rebuild_student_summary(student_id)
+        return
+
+    if old_status:
+        field = _count_field(old_status)
+        if getattr(summary, field) == 0:
+            # 汇总已与订单表不一致（如汇总上线前的旧数据）：重新计算而不是截断为 0
+            rebuild_student_summary(student_id)
+            return
+        setattr(summary, field, getattr(summary, field) - 1)
+    if new_status:
+        field = _count_field(new_status)
+        setattr(summary, field, getattr(summary, field) + 1)
+
+    active_ids = [i for i in summary.active_order_ids if i != order_id]
+    if new_status in ACTIVE_STATUSES:
+        active_ids.append(order_id)
+    summary.active_order_ids = sorted(active_ids)
+    summary.save()
@@ -1,3 +1,746 @@
-from django.test import TestCase
+import csv
+import gzip
+import http.client
+import json
+import re
+import tempfile
+import threading
+from io import StringIO
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, time, timedelta
+from functools import partial
+from http.server import ThreadingHTTPServer
+from unittest import mock
+from urllib.error import HTTPError, URLError
+from urllib.parse import unquote
 
-# Create your tests here.
+import qrcode
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.utils import OperationalError
+from django.http import HttpResponse
+from django.db.backends.mysql.base import DatabaseWrapper as MySQLDatabaseWrapper
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+
+from .archive import archive_delivered_orders
+from .db_router import (
+    STICKY_CACHE_KEY, PrimaryReplicaRouter, ReplicaRoutingMiddleware, _read_alias, _replica_down_until, _use_replica,
+)
+from .exports import ORDER_EXPORT_FIELDS, iter_rows
+from .management.commands.bench_serving import Command as BenchServingCommand
+from .management.commands.run_qr_decoder import QRDecodeHandler
+from .models import ArchivedOrder, DeliveryOrder, DeliverySlot, IdempotencyKey, Message, Robot, StudentOrderSummary
+from .qr_decode import QRImageTooLarge, decode_remote
+from .search import search_orders
+from .summaries import rebuild_student_summary
+from .utils import generate_qr_codes, generate_signed_payload, qr_matrix, render_qr_png, render_qr_svg
+from .views import DispatchOrderViewSet, UserViewSet
+
+User = get_user_model()
+
+
+ORDER_PAYLOAD = {
+    'package_type': '快递',
+    'weight': '1kg',
+    'pickup_building': '图书馆',
+    'delivery_building': '宿舍1号楼',
+    'delivery_speed': 'standard',
+}
+
+
+def make_order(student, **fields):
+    return DeliveryOrder.objects.create(student=student, **{**ORDER_PAYLOAD, **fields})
+
+
+# 接口测试只读主库（DJANGO_DB=sqlite 时也不碰 replica1），读写分离见 ReplicaRoutingTests
+@override_settings(DATABASE_REPLICAS=[])
+class ApiTestCase(TestCase):
+    def setUp(self):
+        # 限流令牌桶、未处理计数等缓存在测试之间不共享
+        caches['default'].clear()
+        caches['throttle'].clear()
+
+    def as_user(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+
+class OrderSearchTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.zhang = User.objects.create_user(username='张三', password=None, is_student=True)
+        self.li = User.objects.create_user(username='李四', password=None, is_student=True)
+        self.dispatcher = User.objects.create_user(username='dispatcher', password=None, is_dispatcher=True)
+        self.client = self.as_user(self.dispatcher)
+
+        self.library_zhang = make_order(self.zhang, pickup_building='图书馆')
+        make_order(self.zhang, pickup_building='食堂')
+        make_order(self.li, pickup_building='图书馆')
+
+    def search(self, **params):
+        return self.client.get('/api/dispatch/orders/search/', params)
+
+    def test_building_and_username_tokens_are_anded(self):
+        response = self.search(q='图书馆 张三')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.data['results']], [self.library_zhang.id])
+
+    def test_username_token_in_any_position(self):
+        response = self.search(q='张三 图书馆')
+        self.assertEqual([row['id'] for row in response.data['results']], [self.library_zhang.id])
+
+    def test_text_only_tokens(self):
+        response = self.search(q='图书馆')
+        self.assertEqual(response.data['count'], 2)
+
+    def test_mysql_uses_plain_fulltext_predicate(self):
+        mysql = MySQLDatabaseWrapper({**connection.settings_dict, 'ENGINE': 'django.db.backends.mysql'}, 'mysql')
+        with mock.patch('core.search.connection', vendor='mysql'):
+            queryset = search_orders(DeliveryOrder.objects.all(), '图书馆 急件 张三')
+        sql, params = queryset.query.get_compiler(connection=mysql).as_sql()
+
+        self.assertIn(
+            'MATCH(core_deliveryorder.description, core_deliveryorder.package_type, '
+            'core_deliveryorder.pickup_building, core_deliveryorder.delivery_building) '
+            'AGAINST (%s IN BOOLEAN MODE)) > %s',
+            sql,
+        )
+        self.assertNotIn('= %s', sql)
+        # 不匹配用户名的两个词合并为一个 MATCH，用户名词单独 “全文 OR 学生”
+        self.assertIn('+"图书馆" +"急件"', params)
+        self.assertIn('+"张三"', params)
+        self.assertIn(self.zhang.id, params)
+
+    def test_facets_are_opt_in(self):
+        self.assertNotIn('facets', self.search(q='图书馆').data)
+        facets = self.search(q='图书馆', facets='1').data['facets']
+        self.assertEqual(facets['pickup_building'], {'图书馆': 2})
+
+
+class ThrottleTests(ApiTestCase):
+    def post_message(self, forwarded_for):
+        return self.client.post(
+            '/api/messages/',
+            {'name': '访客', 'email': 'guest@example.com', 'message': '你好'},
+            HTTP_X_FORWARDED_FOR=forwarded_for,
+        )
+
+    def test_rotating_forwarded_for_does_not_bypass_limit(self):
+        # message_create 预算为 5/min
+        for i in range(5):
+            self.assertEqual(self.post_message(f'10.0.0.{i}').status_code, 201)
+        response = self.post_message('10.0.0.99')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+
+class IdempotencyTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.student = User.objects.create_user(username='student', password=None, is_student=True)
+        self.client = self.as_user(self.student)
+
+    def create_order(self, key, **fields):
+        return self.client.post('/api/orders/', {**ORDER_PAYLOAD, **fields}, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_replay_returns_first_response(self):
+        first = self.create_order('k1')
+        second = self.create_order('k1')
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(second.data['id'], first.data['id'])
+        self.assertEqual(DeliveryOrder.objects.count(), 1)
+
+    def test_reused_key_with_different_body_is_rejected(self):
+        self.create_order('k1')
+        response = self.create_order('k1', pickup_building='食堂')
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(DeliveryOrder.objects.count(), 1)
+
+    def _leave_in_flight(self, key):
+        # 首个请求写入处理中记录后进程被杀死
+        self.create_order(key)
+        DeliveryOrder.objects.all().delete()
+        record = IdempotencyKey.objects.get(key=key)
+        IdempotencyKey.objects.filter(pk=record.pk).update(response_status=None, response_body=None)
+        return record
+
+    def test_in_flight_request_gets_409(self):
+        self._leave_in_flight('k1')
+        self.assertEqual(self.create_order('k1').status_code, 409)
+        self.assertEqual(DeliveryOrder.objects.count(), 0)
+
+    def test_abandoned_in_flight_request_is_taken_over(self):
+        record = self._leave_in_flight('k1')
+        stale = timezone.now() - settings.IDEMPOTENCY_IN_FLIGHT_LEASE - timedelta(seconds=1)
+        IdempotencyKey.objects.filter(pk=record.pk).update(created_at=stale)
+
+        response = self.create_order('k1')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(DeliveryOrder.objects.count(), 1)
+        record.refresh_from_db()
+        self.assertEqual(record.response_status, 201)
+        self.assertEqual(record.response_body['id'], response.data['id'])
+        self.assertEqual(self.create_order('k1')['Idempotent-Replayed'], 'true')
+
+
+class OrderSummaryTests(ApiTestCase):
+    SUMMARY_FIELDS = ('pending_count', 'assigned_count', 'delivering_count', 'delivered_count', 'active_order_ids')
+
+    def setUp(self):
+        super().setUp()
+        self.student = User.objects.create_user(username='student', password=None, is_student=True)
+        self.teacher = User.objects.create_user(username='teacher', password=None, is_teacher=True)
+        self.dispatcher = User.objects.create_user(username='dispatcher', password=None, is_dispatcher=True)
+        Robot.objects.create(name='robot-1')
+
+    def create_order(self):
+        response = self.as_user(self.student).post('/api/orders/', ORDER_PAYLOAD, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def set_status(self, order_id, new_status):
+        response = self.as_user(self.dispatcher).patch(
+            f'/api/dispatch/orders/{order_id}/', {'status': new_status}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def verify_qr(self, order_id):
+        qr_content = json.dumps(generate_signed_payload(order_id, self.student.id)).encode()
+        upload = SimpleUploadedFile('qr.png', b'png', content_type='image/png')
+        with mock.patch('core.views.decode_qr', return_value=[qr_content]):
+            response = APIClient().post('/api/verify_qr/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+
+    def summary(self):
+        summary = StudentOrderSummary.objects.get(student=self.student)
+        return {field: getattr(summary, field) for field in self.SUMMARY_FIELDS}
+
+    def assertSummaryMatchesOrders(self):
+        maintained = self.summary()
+        rebuild_student_summary(self.student.id)
+        self.assertEqual(maintained, self.summary())
+        return maintained
+
+    def test_summary_follows_every_write_path(self):
+        first = self.create_order()
+        second = self.create_order()
+        self.assertEqual(self.assertSummaryMatchesOrders()['pending_count'], 2)
+
+        response = self.as_user(self.teacher).put(f'/api/orders/{first}/', {}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.assertSummaryMatchesOrders()['assigned_count'], 1)
+
+        self.set_status(first, 'DELIVERING')
+        self.assertEqual(self.assertSummaryMatchesOrders()['delivering_count'], 1)
+
+        self.verify_qr(first)
+        summary = self.assertSummaryMatchesOrders()
+        self.assertEqual(summary['delivered_count'], 1)
+        self.assertEqual(summary['active_order_ids'], [second])
+
+        self.assertEqual(self.as_user(self.student).delete(f'/api/orders/{second}/').status_code, 204)
+        summary = self.assertSummaryMatchesOrders()
+        self.assertEqual(summary['pending_count'], 0)
+        self.assertEqual(summary['active_order_ids'], [])
+
+    def test_status_change_uses_locked_row_not_stale_instance(self):
+        order_id = self.create_order()
+        stale = DeliveryOrder.objects.get(pk=order_id)
+        self.set_status(order_id, 'ASSIGNED')
+
+        # get_object() 读到的是并发修改前的订单
+        with mock.patch.object(DispatchOrderViewSet, 'get_object', return_value=stale):
+            self.set_status(order_id, 'DELIVERING')
+        summary = self.assertSummaryMatchesOrders()
+        self.assertEqual(summary['assigned_count'], 0)
+        self.assertEqual(summary['delivering_count'], 1)
+
+    def test_assigning_an_order_twice_is_rejected(self):
+        order_id = self.create_order()
+        Robot.objects.create(name='robot-2')
+        teacher = self.as_user(self.teacher)
+        self.assertEqual(teacher.put(f'/api/orders/{order_id}/', {}, format='json').status_code, 200)
+        self.assertEqual(teacher.put(f'/api/orders/{order_id}/', {}, format='json').status_code, 400)
+        self.assertEqual(Robot.objects.filter(is_available=False).count(), 1)
+        self.assertEqual(self.assertSummaryMatchesOrders()['assigned_count'], 1)
+
+    def test_summary_get_rebuilds_from_primary(self):
+        self.create_order()
+        StudentOrderSummary.objects.all().delete()
+        response = self.as_user(self.student).get('/api/orders/summary/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['pending_count'], 1)
+
+
+class DeliverySlotTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.student = User.objects.create_user(username='student', password=None, is_student=True)
+        self.dispatcher = User.objects.create_user(username='dispatcher', password=None, is_dispatcher=True)
+        self.robot = Robot.objects.create(name='robot-1')
+        self.day = date.today() + timedelta(days=1)
+
+    def book(self, at):
+        return self.as_user(self.student).post(
+            '/api/orders/', {**ORDER_PAYLOAD, 'scheduled_date': self.day, 'scheduled_time': at}, format='json',
+        )
+
+    def reschedule(self, order_id, at):
+        return self.as_user(self.dispatcher).put(
+            f'/api/dispatch/orders/{order_id}/',
+            {**ORDER_PAYLOAD, 'scheduled_date': self.day, 'scheduled_time': at},
+            format='json',
+        )
+
+    def reserved(self, at):
+        slot = DeliverySlot.objects.filter(date=self.day, start_time=at).first()
+        return slot.reserved if slot else 0
+
+    def test_full_slot_is_rejected_with_suggestions_and_freed_on_delete(self):
+        first = self.book('10:00')
+        self.assertEqual(first.status_code, 201)
+
+        full = self.book('10:10')
+        self.assertEqual(full.status_code, 400)
+        self.assertEqual(full.data['suggested_slots'], ['09:30', '10:30', '09:00'])
+
+        self.as_user(self.student).delete(f"/api/orders/{first.data['id']}/")
+        self.assertEqual(self.reserved(time(10, 0)), 0)
+        self.assertEqual(self.book('10:10').status_code, 201)
+
+    def test_update_in_own_slot_is_not_rejected(self):
+        order_id = self.book('10:00').data['id']
+        response = self.reschedule(order_id, '10:15')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.reserved(time(10, 0)), 1)
+
+    def test_moving_to_another_slot_reserves_new_and_releases_old(self):
+        order_id = self.book('10:00').data['id']
+        self.assertEqual(self.reschedule(order_id, '11:00').status_code, 200)
+        self.assertEqual(self.reserved(time(10, 0)), 0)
+        self.assertEqual(self.reserved(time(11, 0)), 1)
+
+        self.book('10:00')
+        response = self.reschedule(order_id, '10:00')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.reserved(time(11, 0)), 1)
+        self.assertEqual(DeliveryOrder.objects.get(pk=order_id).scheduled_time, time(11, 0))
+
+    def test_capacity_follows_live_fleet(self):
+        self.assertEqual(self.book('10:00').status_code, 201)
+        self.assertEqual(self.book('10:00').status_code, 400)
+
+        Robot.objects.create(name='robot-2')
+        self.assertEqual(self.book('10:00').status_code, 201)
+
+        Robot.objects.filter(name='robot-2').delete()
+        slots = self.as_user(self.student).get('/api/slots/', {'date': self.day}).data['slots']
+        ten = next(slot for slot in slots if slot['start_time'] == '10:00')
+        self.assertEqual((ten['capacity'], ten['remaining']), (1, 0))
+        self.assertEqual(self.book('10:00').status_code, 400)
+
+    def test_slot_capacity_override(self):
+        DeliverySlot.objects.create(date=self.day, start_time=time(10, 0), capacity=0)
+        self.assertEqual(self.book('10:00').status_code, 400)
+        self.assertEqual(self.book('10:30').status_code, 201)
+
+    def test_no_robots_means_no_capacity_limit(self):
+        Robot.objects.all().delete()
+        for _ in range(3):
+            self.assertEqual(self.book('10:00').status_code, 201)
+        self.assertEqual(self.reserved(time(10, 0)), 3)
+
+        slots = self.as_user(self.student).get('/api/slots/', {'date': self.day}).data['slots']
+        self.assertEqual(slots[0]['capacity'], None)
+
+
+class QRRenderTests(TestCase):
+    def test_svg_path_reproduces_module_matrix(self):
+        data = generate_signed_payload(1, 2)
+        modules = qr_matrix(data)
+        svg = unquote(render_qr_svg(data).split(',', 1)[1])
+        path = re.search(r'stroke="#000" d="M[\d.]+ [\d.]+(.*?)"', svg).group(1)
+
+        drawn = [[False] * len(modules) for _ in modules]
+        x = y = 0
+        for dx, dy, run in re.findall(r'm(-?\d+) (-?\d+)h(\d+)', path):
+            x, y = x + int(dx), y + int(dy)
+            for i in range(int(run)):
+                drawn[y][x + i] = True
+            x += int(run)
+        self.assertEqual(drawn, [list(row) for row in modules])
+
+    def test_concurrent_renders_do_not_interfere(self):
+        # gthread worker 中多个线程同时下单；载荷长短不一，版本与纠错等级各不相同
+        payloads = [{**generate_signed_payload(i, i * 7), 'note': 'x' * (i * 5)} for i in range(48)]
+        render = partial(qr_matrix, mask_pattern=0)  # 固定掩码只为让测试更快
+        expected = [render(data) for data in payloads]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            for _ in range(3):
+                self.assertEqual(list(pool.map(render, payloads)), expected)
+
+    def test_only_batch_rendering_uses_fixed_mask(self):
+        data = generate_signed_payload(1, 2)
+        with mock.patch('qrcode.QRCode', wraps=qrcode.QRCode) as qr_class:
+            render_qr_png(data)
+            self.assertIsNone(qr_class.call_args.kwargs['mask_pattern'])
+            with self.settings(QR_BATCH_MASK_PATTERN=3):
+                batch = generate_qr_codes([data], processes=1)
+            self.assertEqual(qr_class.call_args.kwargs['mask_pattern'], 3)
+        self.assertEqual(batch, [render_qr_png(data, 3)])
+
+
+class QRDecodeServiceTests(TestCase):
+    """
+    decode_remote 与 run_qr_decoder 两端的约定：结果以 base64 传输，图片过大返回 413
+    """
+
+    def setUp(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), QRDecodeHandler)
+        threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.port = server.server_address[1]
+
+        # 测试环境没有 libzbar，解码本身用 mock 代替
+        patcher = mock.patch('core.management.commands.run_qr_decoder.decode_local')
+        self.decode_local = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(QRDecodeHandler, 'log_message')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        service = override_settings(QR_DECODE_SERVICE_URL=f'http://127.0.0.1:{self.port}/')
+        service.enable()
+        self.addCleanup(service.disable)
+
+    def post_raw(self, content_length):
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=5)
+        self.addCleanup(conn.close)
+        conn.putrequest('POST', '/')
+        if content_length is not None:
+            conn.putheader('Content-Length', content_length)
+        conn.endheaders(b'png')
+        return conn.getresponse()
+
+    def test_results_round_trip_as_bytes(self):
+        self.decode_local.return_value = [b'{"order_id": 1}', b'\xff\x00']
+        self.assertEqual(decode_remote(b'png'), [b'{"order_id": 1}', b'\xff\x00'])
+        self.assertEqual(self.decode_local.call_args.args[0].read(), b'png')
+
+    def test_too_large_raises_qr_image_too_large(self):
+        with self.settings(QR_UPLOAD_MAX_BYTES=2):
+            with self.assertRaises(QRImageTooLarge):
+                decode_remote(b'png')
+        self.decode_local.assert_not_called()
+
+        self.decode_local.side_effect = QRImageTooLarge
+        with self.assertRaises(QRImageTooLarge):
+            decode_remote(b'png')
+
+    def test_decode_errors_are_400(self):
+        self.decode_local.side_effect = ValueError('not an image')
+        with self.assertRaises(HTTPError) as ctx:
+            decode_remote(b'png')
+        self.assertEqual(ctx.exception.code, 400)
+
+    def test_missing_or_invalid_content_length_is_rejected(self):
+        for value in (None, '-1', 'abc'):
+            with self.subTest(content_length=value):
+                self.assertEqual(self.post_raw(value).status, 411)
+        self.decode_local.assert_not_called()
+
+
+class MessageInboxTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = self.as_user(User.objects.create_user(username='admin', password=None, is_staff=True))
+
+    def submit(self, **fields):
+        return APIClient().post(
+            '/api/messages/', {'name': '访客', 'email': 'guest@example.com', 'message': '你好', **fields}, format='json',
+        )
+
+    def unread(self):
+        return self.admin.get('/api/messages/unread_count/').data['unread']
+
+    def assertUnread(self, expected):
+        self.assertEqual(Message.objects.filter(handled=False).count(), expected)
+        self.assertEqual(self.unread(), expected)
+
+    def test_anonymous_submission_cannot_set_handled(self):
+        self.assertUnread(0)
+        response = self.submit(handled=True)
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(response.data['handled'])
+        self.assertFalse(Message.objects.get().handled)
+        self.assertUnread(1)
+
+    def test_counter_follows_triage(self):
+        self.assertUnread(0)
+        ids = [self.submit().data['id'] for _ in range(3)]
+        self.assertUnread(3)
+
+        self.admin.post('/api/messages/bulk_mark/', {'ids': ids[:2], 'handled': True}, format='json')
+        self.assertUnread(1)
+        # 重复标记不会重复计数
+        self.admin.post('/api/messages/bulk_mark/', {'ids': ids[:2], 'handled': True}, format='json')
+        self.assertUnread(1)
+
+        response = self.admin.patch(f'/api/messages/{ids[0]}/', {'handled': False}, format='json')
+        self.assertFalse(response.data['handled'])
+        self.assertUnread(2)
+
+        self.admin.post('/api/messages/bulk_delete/', {'ids': ids[:2]}, format='json')
+        self.assertUnread(1)
+
+
+class BenchServingTests(TestCase):
+    def test_http_error_response_means_server_is_ready(self):
+        error = HTTPError('http://127.0.0.1/api/', 401, 'Unauthorized', {}, None)
+        with mock.patch('core.management.commands.bench_serving.urlopen', side_effect=error):
+            self.assertTrue(BenchServingCommand()._wait_ready('http://127.0.0.1/api/', timeout=1))
+
+    def test_connection_refused_is_not_ready(self):
+        with mock.patch('core.management.commands.bench_serving.urlopen', side_effect=URLError('refused')), \
+                mock.patch('core.management.commands.bench_serving.time.sleep'):
+            self.assertFalse(BenchServingCommand()._wait_ready('http://127.0.0.1/api/', timeout=0.05))
+
+
+class ArchiveOrdersTests(TestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(username='student', password=None, is_student=True)
+        self.old_delivered = [make_order(self.student, status='DELIVERED', qr_code_url='data:') for _ in range(3)]
+        self.old_active = make_order(self.student, status='DELIVERING')
+        self.recent_delivered = make_order(self.student, status='DELIVERED')
+        DeliveryOrder.objects.exclude(pk=self.recent_delivered.pk).update(
+            created_at=timezone.now() - timedelta(days=100),
+        )
+        rebuild_student_summary(self.student.id)
+
+    def summary_counts(self):
+        summary = StudentOrderSummary.objects.get(student=self.student)
+        return summary.delivering_count, summary.delivered_count
+
+    def test_archives_only_old_delivered_orders_in_batches(self):
+        before = self.summary_counts()
+        self.assertEqual(archive_delivered_orders(days=90, batch_size=2), 3)
+
+        old_ids = sorted(order.id for order in self.old_delivered)
+        self.assertEqual(sorted(ArchivedOrder.objects.values_list('id', flat=True)), old_ids)
+        self.assertFalse(DeliveryOrder.objects.filter(id__in=old_ids).exists())
+        self.assertTrue(DeliveryOrder.objects.filter(pk=self.old_active.pk).exists())
+        self.assertTrue(DeliveryOrder.objects.filter(pk=self.recent_delivered.pk).exists())
+
+        # 归档订单仍计入 delivered_count
+        self.assertEqual(self.summary_counts(), before)
+        rebuild_student_summary(self.student.id)
+        self.assertEqual(self.summary_counts(), before)
+
+    def test_dry_run_changes_nothing(self):
+        out = StringIO()
+        call_command('archive_orders', '--days', '90', '--dry-run', stdout=out)
+        self.assertIn('3', out.getvalue())
+        self.assertEqual(DeliveryOrder.objects.count(), 5)
+        self.assertFalse(ArchivedOrder.objects.exists())
+
+    def test_export_appends_ndjson_without_qr(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'orders.ndjson.gz'
+            archive_delivered_orders(days=90, export_path=path)
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                rows = [json.loads(line) for line in f]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual({row['status'] for row in rows}, {'DELIVERED'})
+        self.assertNotIn('qr_code_url', rows[0])
+
+    def test_rerun_is_a_no_op(self):
+        archive_delivered_orders(days=90)
+        self.assertEqual(archive_delivered_orders(days=90), 0)
+        self.assertEqual(ArchivedOrder.objects.count(), 3)
+
+
+class ExportTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.student = User.objects.create_user(username='student', password=None, is_student=True)
+        self.teacher = self.as_user(User.objects.create_user(username='teacher', password=None, is_teacher=True))
+        self.orders = [
+            make_order(self.student, status='PENDING', pickup_building='图书馆'),
+            make_order(self.student, status='DELIVERED', pickup_building='食堂', delivery_building='图书馆'),
+            make_order(self.student, status='DELIVERED', pickup_building='食堂'),
+        ]
+        DeliveryOrder.objects.filter(pk=self.orders[0].pk).update(created_at=timezone.now() - timedelta(days=10))
+
+    def export_orders(self, **params):
+        return self.teacher.get('/api/export/orders/', params)
+
+    def csv_rows(self, response):
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content).decode()
+        header, *rows = csv.reader(content.splitlines())
+        self.assertEqual(header, ORDER_EXPORT_FIELDS)
+        return [int(row[0]) for row in rows]
+
+    def test_csv_export_applies_filters(self):
+        ids = [order.id for order in self.orders]
+        self.assertEqual(self.csv_rows(self.export_orders()), ids)
+        self.assertEqual(self.csv_rows(self.export_orders(status='DELIVERED')), ids[1:])
+        self.assertEqual(self.csv_rows(self.export_orders(building='图书馆')), ids[:2])
+        self.assertEqual(self.csv_rows(self.export_orders(date_from=timezone.localdate().isoformat())), ids[1:])
+
+    def test_after_cursor_resumes_export(self):
+        response = self.export_orders(fmt='ndjson', after=self.orders[0].id)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['id'] for row in rows], [order.id for order in self.orders[1:]])
+        self.assertEqual(rows[0]['student__username'], 'student')
+
+    def test_keyset_pagination_across_chunks(self):
+        rows = list(iter_rows(DeliveryOrder.objects.all(), ['id'], chunk_size=2))
+        self.assertEqual(rows, [(order.id,) for order in self.orders])
+
+    def test_bad_params_are_rejected(self):
+        for params in ({'fmt': 'xlsx'}, {'date_from': '2024/01/01'}, {'after': 'abc'}):
+            self.assertEqual(self.export_orders(**params).status_code, 400, params)
+
+    def test_students_cannot_export(self):
+        self.assertEqual(self.as_user(self.student).get('/api/export/orders/').status_code, 403)
+
+    def test_message_export_includes_handled(self):
+        Message.objects.create(name='访客', email='guest@example.com', message='你好', handled=True)
+        admin = self.as_user(User.objects.create_user(username='admin', password=None, is_staff=True))
+        response = admin.get('/api/export/messages/', {'fmt': 'ndjson'})
+        row = json.loads(b''.join(response.streaming_content))
+        self.assertIs(row['handled'], True)
+
+
+class UserViewSetTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_user(username='admin', password=None, is_staff=True)
+        User.objects.bulk_create(
+            [User(username=f'student_{i}', email=f's{i}@example.com', is_student=True) for i in range(3)]
+            + [User(username='teacher', is_teacher=True), User(username='dispatcher', is_dispatcher=True)]
+        )
+
+    def list_users(self, client, **params):
+        return client.get('/api/users/', params)
+
+    def test_list_is_admin_only(self):
+        self.assertEqual(self.list_users(self.client).status_code, 401)
+        student = User.objects.get(username='student_0')
+        self.assertEqual(self.list_users(self.as_user(student)).status_code, 403)
+
+    def test_role_filters_and_pagination(self):
+        admin = self.as_user(self.admin)
+        students = self.list_users(admin, is_student='true').data
+        self.assertEqual(students['count'], 3)
+        self.assertEqual([u['username'] for u in students['results']], ['student_0', 'student_1', 'student_2'])
+        self.assertNotIn('password', students['results'][0])
+
+        others = self.list_users(admin, is_student='false', is_teacher='false').data
+        self.assertEqual({u['username'] for u in others['results']}, {'admin', 'dispatcher'})
+
+        page = self.list_users(admin, page_size=2, page=2).data
+        self.assertEqual(page['count'], 6)
+        self.assertEqual(len(page['results']), 2)
+        self.assertIsNotNone(page['next'])
+
+    def test_me_reflects_changes_immediately(self):
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 401)
+
+        client = self.as_user(self.admin)
+        self.assertFalse(client.get('/api/users/me/').data['is_dispatcher'])
+        User.objects.filter(pk=self.admin.pk).update(is_dispatcher=True)
+        self.admin.refresh_from_db()
+        me = self.as_user(self.admin).get('/api/users/me/').data
+        self.assertTrue(me['is_dispatcher'])
+        self.assertEqual(me['username'], 'admin')
+        self.assertNotIn('password', me)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaRoutingTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        _replica_down_until.clear()
+        # 副本连接用 mock 代替，测试环境里不需要真的有 replica1
+        patcher = mock.patch('core.db_router.connections')
+        self.replica = patcher.start().__getitem__.return_value
+        self.addCleanup(patcher.stop)
+        # 路由状态不随请求结束复位，避免泄漏到后续测试
+        self.addCleanup(_read_alias.set, None)
+        self.addCleanup(_use_replica.set, False)
+        self.router = PrimaryReplicaRouter()
+
+    def route(self, method='get', reads=True, status=200, ip='10.0.0.1'):
+        """
+        经过中间件发一个请求，返回视图中读查询被路由到的库（不读库时为 None）
+        """
+        seen = []
+
+        def view(request):
+            if reads:
+                seen.append(self.router.db_for_read(DeliveryOrder))
+            return HttpResponse(status=status)
+
+        request = getattr(RequestFactory(), method)('/api/orders/', REMOTE_ADDR=ip)
+        ReplicaRoutingMiddleware(view)(request)
+        return seen[0] if seen else None
+
+    def test_replica_is_picked_on_first_read(self):
+        self.assertIsNone(self.route(reads=False))
+        self.replica.ensure_connection.assert_not_called()
+
+        self.assertEqual(self.route(), 'replica1')
+        self.replica.ensure_connection.assert_called_once()
+        self.assertEqual(self.router.db_for_write(DeliveryOrder), 'default')
+
+    def test_successful_write_makes_client_sticky(self):
+        self.route('post', reads=False, status=400)
+        self.assertEqual(self.route(), 'replica1')
+
+        self.route('post', reads=False, status=201)
+        self.assertEqual(self.route(), 'default')
+        self.assertEqual(self.route(ip='10.0.0.2'), 'replica1')
+
+        cache.delete(STICKY_CACHE_KEY % '10.0.0.1')
+        self.assertEqual(self.route(), 'replica1')
+
+    def test_unreachable_replica_falls_back_to_primary(self):
+        self.replica.ensure_connection.side_effect = OperationalError
+        self.assertEqual(self.route(), 'default')
+        # 暂停期内不再尝试连接
+        self.assertEqual(self.route(), 'default')
+        self.replica.ensure_connection.assert_called_once()
+
+    def test_replica_failing_mid_request_is_retried_on_primary(self):
+        router = self.router
+
+        def me(viewset, request):
+            alias = router.db_for_read(User)
+            if alias == 'replica1':
+                raise OperationalError('server has gone away')
+            return Response({'db': alias})
+
+        client = self.as_user(User.objects.create_user(username='student', password=None, is_student=True))
+        with mock.patch.object(UserViewSet, 'get_current_user', me):
+            response = client.get('/api/users/me/')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data, {'db': 'default'})
+            self.replica.close.assert_called_once()
+
+            self.assertEqual(client.get('/api/users/me/').data, {'db': 'default'})
+        self.replica.ensure_connection.assert_called_once()
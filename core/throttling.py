@@ -0,0 +1,59 @@
+# core/throttling.py
+
+import threading
+
+from django.core.cache import caches
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    令牌桶限流：视图通过 throttle_scope 指定预算，预算在
+    REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] 中配置（如 '5/min'）
+    桶容量为次数，按 次数/周期 匀速补充；登录用户按 id 计，匿名按 IP 计
+    （IP 由 REST_FRAMEWORK['NUM_PROXIES'] 决定取 REMOTE_ADDR 还是代理追加的 X-Forwarded-For 项）
+    超限时 DRF 返回 429 并带 Retry-After
+    """
+    cache = caches['throttle']
+    cache_format = 'throttle_%(scope)s_%(ident)s'
+
+    # 锁保证本进程内读-改-写原子；生产环境 throttle 为多进程共享缓存，
+    # 跨进程并发时偶尔会多放行一次，但不会按 worker 数成倍放大预算
+    _lock = threading.Lock()
+
+    def __init__(self):
+        # scope 由视图决定，不在这里读取 rate
+        self.wait_seconds = None
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = f"user{request.user.pk}"
+        else:
+            ident = f"ip{self.get_ident(request)}"
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, 'throttle_scope', None)
+        if not self.scope:
+            return True
+
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        if self.num_requests is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        refill_per_second = self.num_requests / self.duration
+        now = self.timer()
+
+        with self._lock:
+            tokens, last = self.cache.get(self.key, (self.num_requests, now))
+            tokens = min(self.num_requests, tokens + (now - last) * refill_per_second)
+            if tokens < 1:
+                self.wait_seconds = (1 - tokens) / refill_per_second
+                return False
+            self.cache.set(self.key, (tokens - 1, now), self.duration)
+        return True
+
+    def wait(self):
+        return self.wait_seconds
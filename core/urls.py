@@ -2,7 +2,7 @@
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import DeliveryOrderViewSet, RobotViewSet, UserViewSet, DispatchOrderViewSet, MessageViewSet, QRCodeVerifyView
+from .views import DeliveryOrderViewSet, RobotViewSet, UserViewSet, DispatchOrderViewSet, MessageViewSet, QRCodeVerifyView, ArchivedOrderViewSet, OrderExportView, MessageExportView, DeliverySlotView
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 router = DefaultRouter()
@@ -14,6 +14,8 @@ router.register(r'dispatch/orders', DispatchOrderViewSet, basename='dispatch-ord
 
 router.register('messages', MessageViewSet, basename='messages')
 
+router.register(r'archive/orders', ArchivedOrderViewSet, basename='archived-orders')
+
 
 
 # www.luanqibazao.com/login
@@ -22,5 +24,8 @@ urlpatterns = [
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/verify_qr/', QRCodeVerifyView.as_view(), name='verify-qr'),
+    path('api/export/orders/', OrderExportView.as_view(), name='export-orders'),
+    path('api/export/messages/', MessageExportView.as_view(), name='export-messages'),
+    path('api/slots/', DeliverySlotView.as_view(), name='delivery-slots'),
 
 ]
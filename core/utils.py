@@ -1,10 +1,14 @@
-import qrcode
 import base64
 import json
 import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
+from urllib.parse import quote
 from django.conf import settings
 
+# qrcode / PIL / numpy 较重，只在真正渲染二维码时才导入
+
 SECRET_KEY = settings.SECRET_KEY  # 🔐 用于签名
 
 def generate_signed_payload(order_id, student_id):
@@ -34,8 +38,134 @@ def generate_qr_code(data: dict) -> str:
     :param data: dict，通常包含 payload(base64字符串) + signature
     :return: base64格式的 PNG 图像字符串（可直接用 <img src=...> 显示）
     """
+    import qrcode
+
     qr = qrcode.make(json.dumps(data, ensure_ascii=False))
     buffer = BytesIO()
     qr.save(buffer, format='PNG')
     img_base64 = base64.b64encode(buffer.getvalue()).decode()
     return f"data:image/png;base64,{img_base64}"
+
+
+# ✅ 批量二维码渲染：最小版本、1 位 PNG / SVG 输出
+QR_LEVEL_ORDER = ['L', 'M', 'Q', 'H']
+
+
+def qr_matrix(data: dict, mask_pattern=None):
+    """
+    按 QR_MIN_ERROR_LEVEL 求能容纳数据的最小版本，再在不增大版本的前提下
+    选用尽可能高的纠错等级；返回不含边框的布尔矩阵
+    mask_pattern 为 None 时逐一评估 8 种掩码取最优，指定 0-7 时使用固定掩码（更快）
+    每次调用新建 QRCode 实例：gthread worker 中多个线程会同时下单渲染，不能共享可变实例
+    """
+    import qrcode
+    from qrcode import constants
+
+    qr = qrcode.QRCode(box_size=settings.QR_BOX_SIZE, border=settings.QR_BORDER, mask_pattern=mask_pattern)
+    qr.add_data(json.dumps(data, ensure_ascii=False))
+
+    min_level = QR_LEVEL_ORDER.index(settings.QR_MIN_ERROR_LEVEL)
+    qr.error_correction = getattr(constants, f'ERROR_CORRECT_{QR_LEVEL_ORDER[min_level]}')
+    version = qr.best_fit()
+    for name in reversed(QR_LEVEL_ORDER[min_level + 1:]):
+        qr.error_correction = getattr(constants, f'ERROR_CORRECT_{name}')
+        if qr.best_fit() == version:
+            break
+    else:
+        qr.error_correction = getattr(constants, f'ERROR_CORRECT_{QR_LEVEL_ORDER[min_level]}')
+
+    qr.version = version
+    qr.make(fit=False)
+    return qr.modules
+
+
+def _matrix_image(modules):
+    from PIL import Image
+
+    try:
+        import numpy as np  # 可选：有 numpy 时用数组放大像素
+    except ImportError:
+        np = None
+
+    box, border = settings.QR_BOX_SIZE, settings.QR_BORDER
+    if np is not None:
+        light = ~np.array(modules, dtype=bool)
+        light = np.pad(light, border, constant_values=True)
+        return Image.fromarray(light.repeat(box, axis=0).repeat(box, axis=1))
+
+    size = len(modules) + border * 2
+    img = Image.new('1', (size, size), 1)
+    img.putdata([
+        0 if border <= y < size - border and border <= x < size - border and modules[y - border][x - border] else 1
+        for y in range(size) for x in range(size)
+    ])
+    return img.resize((size * box, size * box), Image.NEAREST)
+
+
+def render_qr_png(data: dict, mask_pattern=None) -> str:
+    """
+    1 位黑白 PNG，返回 data URI（与 generate_qr_code 的返回格式相同）
+    """
+    buffer = BytesIO()
+    _matrix_image(qr_matrix(data, mask_pattern)).save(buffer, format='PNG', optimize=True)
+    return f"data:image/png;base64,{base64.b64encode(buffer.getvalue()).decode()}"
+
+
+# SVG data URI 用 utf8 URL 编码（比 base64 小约四分之一），这些字符无需转义
+SVG_URI_SAFE = " /:='.-"
+
+
+def render_qr_svg(data: dict, mask_pattern=None) -> str:
+    """
+    SVG（可无损缩放，用于打印）：每行连续的深色模块合并为一段宽 1 的描边，
+    全部使用相对坐标写在同一条路径里，返回 data URI
+    体积仍是 1 位 PNG 的数倍，页面展示应使用 render_qr_png
+    """
+    modules = qr_matrix(data, mask_pattern)
+    box, border = settings.QR_BOX_SIZE, settings.QR_BORDER
+    size = len(modules) + border * 2
+    path = [f"M{border} {border + 0.5}"]
+    px = py = 0
+    for y, row in enumerate(modules):
+        x = 0
+        while x < len(row):
+            if row[x]:
+                start = x
+                while x < len(row) and row[x]:
+                    x += 1
+                path.append(f"m{start - px} {y - py}h{x - start}")
+                px, py = x, y
+            x += 1
+    svg = (
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {size} {size}" '
+        f'width="{size * box}" height="{size * box}" shape-rendering="crispEdges">'
+        f'<path fill="#fff" d="M0 0h{size}v{size}H0z"/><path stroke="#000" d="{"".join(path)}"/></svg>'
+    )
+    return f"data:image/svg+xml,{quote(svg, safe=SVG_URI_SAFE)}"
+
+
+QR_RENDERERS = {'png': render_qr_png, 'svg': render_qr_svg}
+
+
+def _render_chunk(args):
+    fmt, payloads = args
+    renderer = QR_RENDERERS[fmt]
+    return [renderer(data, settings.QR_BATCH_MASK_PATTERN) for data in payloads]
+
+
+def generate_qr_codes(payloads, fmt='png', processes=None, chunk_size=64):
+    """
+    批量渲染二维码：payloads 为 generate_signed_payload 的返回值列表
+    processes 为进程数（默认 CPU 核数，1 表示在当前进程渲染）
+    使用固定掩码 QR_BATCH_MASK_PATTERN
+    :return: 与 payloads 一一对应的 data URI 列表
+    """
+    payloads = list(payloads)
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(payloads) <= chunk_size:
+        return _render_chunk((fmt, payloads))
+
+    chunks = [(fmt, payloads[i:i + chunk_size]) for i in range(0, len(payloads), chunk_size)]
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        return [uri for chunk in pool.map(_render_chunk, chunks) for uri in chunk]
+
@@ -1,18 +1,33 @@
-from django.shortcuts import render
+from django.shortcuts import render, get_object_or_404
 
 # Create your views here.
 from rest_framework import viewsets, permissions, status
-from .models import DeliveryOrder, Robot, Message
-from .serializers import DeliveryOrderSerializer, RobotSerializer, UserSerializer, MessageSerializer
+from .models import DeliveryOrder, Robot, Message, ArchivedOrder
+from .serializers import DeliveryOrderSerializer, RobotSerializer, UserSerializer, MessageSerializer, OrderSearchResultSerializer, ArchivedOrderSerializer, USER_PUBLIC_FIELDS
+from .serializers import StudentOrderSummarySerializer, MessageAdminSerializer, slot_full_error
+from django.utils.dateparse import parse_date
+from .throttling import TokenBucketThrottle
+from .idempotency import idempotent
+from .summaries import record_status_change, rebuild_student_summary
+from django.db import transaction
+from .slots import SlotCalendar, reserve_slot, release_slot, slot_key
+from .pagination import OrderSearchPagination, ArchivedOrderPagination, UserPagination, MessageCursorPagination
+from .inbox import unread_count, adjust_unread, reset_unread
+from .search import search_orders, order_facets
+from .exports import (
+    ExportParamError, export_stream, filter_orders, filter_by_date_range,
+    ORDER_EXPORT_FIELDS, MESSAGE_EXPORT_FIELDS,
+)
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from django.contrib.auth import get_user_model
-from .utils import generate_signed_payload, generate_qr_code
+from .utils import generate_signed_payload, render_qr_png
 from rest_framework.permissions import IsAdminUser, AllowAny
 from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser
-from pyzbar.pyzbar import decode
-from PIL import Image
+from .qr_decode import decode_qr, QRImageTooLarge
 import json, hashlib, base64
 from django.conf import settings
 
@@ -34,16 +49,67 @@ class IsDispatcher(permissions.BasePermission):
         return request.user and request.user.is_authenticated and request.user.is_dispatcher
 
 
+# ✅ 教师或分发人员（报表导出）
+class IsTeacherOrDispatcher(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return request.user and request.user.is_authenticated and (request.user.is_teacher or request.user.is_dispatcher)
+
+
+def _locked_order(pk):
+    """
+    在 transaction.atomic() 内重新读取并锁定订单；状态汇总以锁定后读到的状态为准
+    """
+    return DeliveryOrder.objects.select_for_update().filter(pk=pk).first()
+
+
+def _destroy_order(instance):
+    with transaction.atomic():
+        order = _locked_order(instance.pk)
+        if order is None:
+            # 已被并发删除
+            return
+        order.delete()
+        record_status_change(order.student_id, instance.pk, order.status, None)
+        if order.scheduled_date and order.scheduled_time:
+            release_slot(order.scheduled_date, order.scheduled_time)
+
+
 # ✅ 用户视图（含 /me）
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [TokenBucketThrottle]
+    pagination_class = UserPagination
+
+    ROLE_FILTERS = ('is_student', 'is_teacher', 'is_dispatcher')
+
+    def get_throttles(self):
+        self.throttle_scope = 'user_register' if self.action == 'create' else 'users'
+        return super().get_throttles()
 
-    @action(detail=False, methods=['get'], url_path='me')
+    def get_permissions(self):
+        # 用户列表（含邮箱）仅供管理员后台使用
+        if self.action == 'list':
+            return [IsAdminUser()]
+        return super().get_permissions()
+
+    def get_queryset(self):
+        queryset = User.objects.all()
+        if self.action != 'list':
+            return queryset
+
+        # ?is_student=true&is_teacher=false ... 角色字段均有索引
+        for field in self.ROLE_FILTERS:
+            value = self.request.query_params.get(field)
+            if value is not None:
+                queryset = queryset.filter(**{field: value.lower() in ('1', 'true')})
+        return queryset.only(*USER_PUBLIC_FIELDS).order_by('id')
+
+    @action(detail=False, methods=['get'], url_path='me', permission_classes=[permissions.IsAuthenticated])
     def get_current_user(self, request):
-        serializer = self.get_serializer(request.user)
-        return Response(serializer.data)
+        # request.user 已由 JWT 认证加载，直接序列化，不再额外查询或缓存
+        return Response(self.get_serializer(request.user).data)
 
     @action(detail=True, methods=['post'], permission_classes=[IsAdminUser])
     def set_dispatcher(self, request, pk=None):
@@ -76,12 +142,25 @@ class DeliveryOrderViewSet(viewsets.ModelViewSet):
             return DeliveryOrder.objects.all()
         return DeliveryOrder.objects.filter(student=user)
 
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
     def perform_create(self, serializer):
-        order = serializer.save(student=self.request.user)
-        signed_data = generate_signed_payload(order.id, order.student.id)
-        qr_base64 = generate_qr_code(signed_data)
-        order.qr_code_url = qr_base64
-        order.save()
+        scheduled_date = serializer.validated_data.get('scheduled_date')
+        scheduled_time = serializer.validated_data.get('scheduled_time')
+        with transaction.atomic():
+            if scheduled_date and scheduled_time and not reserve_slot(scheduled_date, scheduled_time):
+                raise slot_full_error(scheduled_date, scheduled_time)
+            order = serializer.save(student=self.request.user)
+            signed_data = generate_signed_payload(order.id, order.student.id)
+            qr_base64 = render_qr_png(signed_data)
+            order.qr_code_url = qr_base64
+            order.save()
+            record_status_change(order.student_id, order.id, None, order.status)
+
+    def perform_destroy(self, instance):
+        _destroy_order(instance)
 
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -89,24 +168,42 @@ class DeliveryOrderViewSet(viewsets.ModelViewSet):
         if not request.user.is_teacher:
             return Response({'detail': '只有教师可以分配机器人'}, status=status.HTTP_403_FORBIDDEN)
 
-        if instance.status != "PENDING":
-            return Response({'detail': '订单已分配或正在配送中'}, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            instance = _locked_order(instance.pk)
+            if instance is None:
+                return Response({'detail': '订单不存在'}, status=status.HTTP_404_NOT_FOUND)
+            if instance.status != "PENDING":
+                return Response({'detail': '订单已分配或正在配送中'}, status=status.HTTP_400_BAD_REQUEST)
 
-        robot = Robot.objects.filter(is_available=True).first()
-        if not robot:
-            return Response({'detail': '当前无可用机器人'}, status=status.HTTP_400_BAD_REQUEST)
+            # 跳过其他事务正在分配的机器人，并发分配不会拿到同一台
+            robot = Robot.objects.select_for_update(skip_locked=True).filter(is_available=True).first()
+            if not robot:
+                return Response({'detail': '当前无可用机器人'}, status=status.HTTP_400_BAD_REQUEST)
 
-        instance.status = "ASSIGNED"
-        instance.teacher = request.user
-        instance.save()
+            instance.status = "ASSIGNED"
+            instance.teacher = request.user
+            instance.save()
 
-        robot.is_available = False
-        robot.current_order = instance
-        robot.save()
+            robot.is_available = False
+            robot.current_order = instance
+            robot.save()
+
+            record_status_change(instance.student_id, instance.id, "PENDING", "ASSIGNED")
 
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'], url_path='summary')
+    def summary(self, request):
+        """
+        学生首页汇总：各状态订单数、进行中订单 id、最后更新时间
+        GET /api/orders/summary/
+        """
+        summary = getattr(request.user, 'order_summary', None)
+        if summary is None:
+            summary = rebuild_student_summary(request.user.id)
+        return Response(StudentOrderSummarySerializer(summary).data)
+
 
 # ✅ 配送人员专属订单操作接口
 class DispatchOrderViewSet(viewsets.ModelViewSet):
@@ -126,10 +223,72 @@ class DispatchOrderViewSet(viewsets.ModelViewSet):
         if new_status not in ['ASSIGNED', 'DELIVERING', 'DELIVERED']:
             return Response({"detail": "不允许设置该状态"}, status=status.HTTP_400_BAD_REQUEST)
 
-        instance.status = new_status
-        instance.save()
+        with transaction.atomic():
+            instance = get_object_or_404(DeliveryOrder.objects.select_for_update(), pk=instance.pk)
+            old_status = instance.status
+            instance.status = new_status
+            instance.save()
+            record_status_change(instance.student_id, instance.id, old_status, new_status)
         return Response(self.get_serializer(instance).data)
 
+    def perform_update(self, serializer):
+        """
+        修改预约时间：换到新时段时原子占用新时段名额并释放原时段
+        """
+        with transaction.atomic():
+            order = get_object_or_404(DeliveryOrder.objects.select_for_update(), pk=serializer.instance.pk)
+            new_date = serializer.validated_data.get('scheduled_date', order.scheduled_date)
+            new_time = serializer.validated_data.get('scheduled_time', order.scheduled_time)
+            old_slot = slot_key(order.scheduled_date, order.scheduled_time)
+            new_slot = slot_key(new_date, new_time)
+
+            if new_slot != old_slot:
+                if new_slot and not reserve_slot(new_date, new_time):
+                    raise slot_full_error(new_date, new_time)
+                if old_slot:
+                    release_slot(order.scheduled_date, order.scheduled_time)
+            serializer.instance = order
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        _destroy_order(instance)
+
+    @action(detail=False, methods=['get'], url_path='search')
+    def search(self, request):
+        """
+        配送员订单检索（全文 + 分页，?facets=1 时附带分面计数）
+        GET /api/dispatch/orders/search/?q=图书馆 张三&status=PENDING&pickup_building=&delivery_building=&facets=1&page=1
+        """
+        queryset = DeliveryOrder.objects.select_related('student').defer('qr_code_url')
+        queryset = search_orders(queryset, request.query_params.get('q'))
+
+        for field in ('status', 'pickup_building', 'delivery_building'):
+            value = request.query_params.get(field)
+            if value:
+                queryset = queryset.filter(**{field: value})
+
+        paginator = OrderSearchPagination()
+        page = paginator.paginate_queryset(queryset.order_by('-id'), request, view=self)
+        response = paginator.get_paginated_response(OrderSearchResultSerializer(page, many=True).data)
+        if request.query_params.get('facets') in ('1', 'true'):
+            response.data['facets'] = order_facets(queryset)
+        return response
+
+
+# ✅ 归档订单只读查询接口
+class ArchivedOrderViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = ArchivedOrderSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ArchivedOrderPagination
+
+    def get_queryset(self):
+        user = self.request.user
+        if user.is_teacher or user.is_dispatcher:
+            queryset = ArchivedOrder.objects.all()
+        else:
+            queryset = ArchivedOrder.objects.filter(student=user)
+        return queryset.order_by('-created_at')
+
 
 # ✅ 机器人接口
 class RobotViewSet(viewsets.ModelViewSet):
@@ -145,17 +304,153 @@ class RobotViewSet(viewsets.ModelViewSet):
 class MessageViewSet(viewsets.ModelViewSet):
     queryset = Message.objects.all().order_by('-created_at')
     serializer_class = MessageSerializer
+    throttle_classes = [TokenBucketThrottle]
+    pagination_class = MessageCursorPagination
+
+    def get_throttles(self):
+        # 只限制匿名可用的留言提交
+        self.throttle_scope = 'message_create' if self.action == 'create' else None
+        return super().get_throttles()
 
     def get_permissions(self):
-        if self.request.method == 'GET':
-            return [permissions.IsAdminUser()]
-        return [permissions.AllowAny()]
+        # 提交留言对所有人开放，其余操作（查看 / 处理 / 删除）仅限管理员
+        if self.action == 'create':
+            return [permissions.AllowAny()]
+        return [permissions.IsAdminUser()]
+
+    def get_serializer_class(self):
+        if self.action == 'create':
+            return MessageSerializer
+        return MessageAdminSerializer
+
+    def get_queryset(self):
+        queryset = Message.objects.all()
+        handled = self.request.query_params.get('handled')
+        if self.action == 'list' and handled is not None:
+            queryset = queryset.filter(handled=handled.lower() in ('1', 'true'))
+        return queryset
+
+    def perform_create(self, serializer):
+        serializer.save()
+        adjust_unread(0 if serializer.instance.handled else 1)
+
+    def perform_update(self, serializer):
+        serializer.save()
+        reset_unread()
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        reset_unread()
+
+    def _bulk_ids(self, request):
+        ids = request.data.get('ids')
+        if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+            return None
+        return ids
+
+    @action(detail=False, methods=['post'], url_path='bulk_mark')
+    def bulk_mark(self, request):
+        """
+        批量标记已处理 / 未处理（单条 UPDATE）
+        POST /api/messages/bulk_mark/
+        {"ids": [1, 2, 3], "handled": true}
+        """
+        ids = self._bulk_ids(request)
+        handled = request.data.get('handled', True)
+        if ids is None or not isinstance(handled, bool):
+            return Response({"detail": "请提供 ids: [id, ...] 与 handled: true/false"}, status=400)
+
+        updated = Message.objects.filter(id__in=ids).exclude(handled=handled).update(handled=handled)
+        adjust_unread(-updated if handled else updated)
+        return Response({"updated": updated})
+
+    @action(detail=False, methods=['post'], url_path='bulk_delete')
+    def bulk_delete(self, request):
+        """
+        批量删除留言（单条 DELETE）
+        POST /api/messages/bulk_delete/
+        {"ids": [1, 2, 3]}
+        """
+        ids = self._bulk_ids(request)
+        if ids is None:
+            return Response({"detail": "请提供 ids: [id, ...]"}, status=400)
+
+        deleted, _ = Message.objects.filter(id__in=ids).delete()
+        reset_unread()
+        return Response({"deleted": deleted})
+
+    @action(detail=False, methods=['get'], url_path='unread_count')
+    def unread_count(self, request):
+        """
+        未处理留言数
+        GET /api/messages/unread_count/
+        """
+        return Response({"unread": unread_count()})
+
+
+class DeliverySlotView(APIView):
+    """
+    某天各预约时段的容量与剩余名额
+    GET /api/slots/?date=YYYY-MM-DD
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        day = parse_date(request.query_params.get('date') or '') or timezone.localdate()
+        return Response({"date": day, "slots": SlotCalendar.load(day).as_list()})
+
+
+def _export_response(queryset, fields, params, name):
+    try:
+        stream, content_type, ext = export_stream(queryset, fields, params)
+    except ExportParamError as e:
+        return Response({"detail": str(e)}, status=400)
+
+    response = StreamingHttpResponse(stream, content_type=content_type)
+    filename = f"{name}-{timezone.now():%Y%m%d%H%M%S}.{ext}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+class OrderExportView(APIView):
+    """
+    流式导出订单（教师 / 分发人员）
+    GET /api/export/orders/?fmt=csv|ndjson&status=&building=&date_from=&date_to=&after=<id>
+    """
+    permission_classes = [IsTeacherOrDispatcher]
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            queryset = filter_orders(DeliveryOrder.objects.all(), params)
+        except ExportParamError as e:
+            return Response({"detail": str(e)}, status=400)
+        return _export_response(queryset, ORDER_EXPORT_FIELDS, params, 'orders')
+
+
+class MessageExportView(APIView):
+    """
+    流式导出留言（管理员）
+    GET /api/export/messages/?fmt=csv|ndjson&date_from=&date_to=&after=<id>
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            queryset = filter_by_date_range(Message.objects.all(), params)
+        except ExportParamError as e:
+            return Response({"detail": str(e)}, status=400)
+        return _export_response(queryset, MESSAGE_EXPORT_FIELDS, params, 'messages')
 
 
 class QRCodeVerifyView(APIView):
     permission_classes = [AllowAny]
     parser_classes = [MultiPartParser]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'verify_qr'
 
+    @idempotent
     def post(self, request):
         image = request.FILES.get('file')
         print("🖼️ 收到上传文件：", image.name if image else "无文件")
@@ -163,16 +458,21 @@ class QRCodeVerifyView(APIView):
         if not image:
             return Response({"error_code": 1001, "detail": "未上传二维码图片"}, status=400)
 
+        if image.size > settings.QR_UPLOAD_MAX_BYTES:
+            return Response({"error_code": 1010, "detail": "二维码图片文件过大"}, status=413)
+
         try:
-            img = Image.open(image)
-            qr_data_list = decode(img)
+            try:
+                qr_data_list = decode_qr(image)
+            except QRImageTooLarge:
+                return Response({"error_code": 1011, "detail": "二维码图片分辨率过大"}, status=413)
             print("🔍 二维码识别结果：", qr_data_list)
 
             if not qr_data_list:
                 return Response({"error_code": 1002, "detail": "无法识别二维码"}, status=400)
 
             try:
-                data = qr_data_list[0].data.decode("utf-8")
+                data = qr_data_list[0].decode("utf-8")
                 print("📦 原始二维码内容：", data)
                 qr_json = json.loads(data)
             except Exception as e:
@@ -212,15 +512,17 @@ class QRCodeVerifyView(APIView):
             if not order_id or not student_id:
                 return Response({"error_code": 1008, "detail": "payload 缺少必要字段"}, status=400)
 
-            try:
-                order = DeliveryOrder.objects.get(id=order_id, student_id=student_id)
+            with transaction.atomic():
+                order = DeliveryOrder.objects.select_for_update().filter(id=order_id, student_id=student_id).first()
+                if order is None:
+                    print("❌ 订单不存在或 student_id 不匹配")
+                    return Response({"error_code": 1009, "detail": "订单不存在或 student_id 不匹配"}, status=404)
                 print("✅ 找到订单：", order.id)
-            except DeliveryOrder.DoesNotExist:
-                print("❌ 订单不存在或 student_id 不匹配")
-                return Response({"error_code": 1009, "detail": "订单不存在或 student_id 不匹配"}, status=404)
 
-            order.status = "DELIVERED"
-            order.save()
+                old_status = order.status
+                order.status = "DELIVERED"
+                order.save()
+                record_status_change(order.student_id, order.id, old_status, order.status)
             print("🚚 状态已更新为已送达")
 
             return Response({
@@ -0,0 +1,47 @@
+"""
+Gunicorn configuration for campus_delivery.
+
+    gunicorn -c gunicorn.conf.py
+
+Every value can be overridden through the environment variables below.
+The production settings also require DJANGO_SECRET_KEY and a shared cache
+(REDIS_URL or MEMCACHED_LOCATION).
+"""
+
+import multiprocessing
+import os
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'campus_delivery.settings_production')
+
+# WSGI（默认）或 ASGI：GUNICORN_APP=campus_delivery.asgi:application GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker
+wsgi_app = os.environ.get('GUNICORN_APP', 'campus_delivery.wsgi:application')
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# 密码哈希线程池按进程创建：把 CPU 核数平分给各 worker，避免每个进程都开满核数个哈希线程
+os.environ.setdefault('PASSWORD_HASH_WORKERS', str(max(1, multiprocessing.cpu_count() // workers)))
+
+# 先在主进程加载应用，fork 出的 worker 共享已加载代码的内存页
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+# 定期回收 worker，抑制内存缓慢增长；加抖动避免所有 worker 同时重启
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 200))
+
+# 优雅退出：收到 SIGTERM 后最多等待 graceful_timeout 秒处理完在途请求
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+accesslog = os.environ.get('GUNICORN_ACCESSLOG') or None
+errorlog = '-'
+
+
+def pre_fork(server, worker):
+    # preload 时主进程可能已打开数据库连接，fork 前关闭，避免子进程共用同一个 socket
+    from django.db import connections
+
+    connections.close_all()